@@ -0,0 +1,13 @@
+# __init__.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Measure the speed of selecting and copying emails.
+
+A synthetic Opera mail store and synthetic mbox files are generated, and the
+EmailCollector stages are timed on them.  The results are written as JSON so
+runs on different commits can be compared.
+
+Run as 'python -m emailstore.benchmark --help' for the options.
+
+"""
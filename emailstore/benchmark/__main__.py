@@ -0,0 +1,180 @@
+# __main__.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Generate benchmark corpora, measure them, and compare the results.
+
+python -m emailstore.benchmark generate <directory> [options]
+python -m emailstore.benchmark run <directory> [--output <results.json>]
+python -m emailstore.benchmark compare <baseline.json> <current.json>
+
+The exit status of compare is 1 if any stage is slower by more than the
+threshold.
+
+"""
+
+import sys
+import json
+import argparse
+
+from . import corpus
+from . import run
+
+
+def _generate(args):
+    """Generate corpus described by args."""
+    description = corpus.generate(
+        args.directory,
+        emails=args.emails,
+        accounts=args.accounts,
+        senders=args.senders,
+        selected=args.selected,
+        days=args.days,
+        attachments=args.attachments,
+        attachment_size=args.attachment_size,
+        mbox_files=args.mbox_files,
+        mbox_bytes=args.mbox_bytes,
+        workers=args.workers,
+        headerindex=args.headerindex,
+        seed=args.seed,
+    )
+    json.dump(description, sys.stdout, indent=1, sort_keys=True)
+    sys.stdout.write("\n")
+    return 0
+
+
+def _run(args):
+    """Measure corpus and write results as JSON."""
+    results = run.run(args.directory, repeat=args.repeat, stores=args.store)
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=1, sort_keys=True)
+        sys.stdout.write("\n")
+    else:
+        with open(args.output, "w", encoding="utf8") as file_open:
+            json.dump(results, file_open, indent=1, sort_keys=True)
+    return 0
+
+
+def _measure(args):
+    """Measure one run of a mail store and write result as JSON."""
+    json.dump(
+        run.measure(args.directory, args.store, warm=args.warm), sys.stdout
+    )
+    return 0
+
+
+def _compare(args):
+    """Compare two results files and report regressions."""
+    results = []
+    for path in (args.baseline, args.current):
+        with open(path, "r", encoding="utf8") as file_open:
+            results.append(json.load(file_open))
+    regressed = False
+    for store, stage, before, after, regression in run.compare(
+        *results, threshold=args.threshold
+    ):
+        sys.stdout.write(
+            "{:<10} {:<21} {:>10.4f} {:>10.4f} {:>+7.1%}{}\n".format(
+                store,
+                stage,
+                before,
+                after,
+                (after - before) / before if before else 0,
+                "  REGRESSION" if regression else "",
+            )
+        )
+        regressed = regressed or regression
+    return 1 if regressed else 0
+
+
+def main(argv=None):
+    """Run the benchmark command given in argv."""
+    parser = argparse.ArgumentParser(
+        prog="python -m emailstore.benchmark",
+        description="Measure the speed of selecting and copying emails.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser(
+        "generate", help="generate a synthetic corpus"
+    )
+    generate.add_argument("directory", help="directory, which must not exist")
+    generate.add_argument("--emails", type=int, default=1000)
+    generate.add_argument("--accounts", type=int, default=2)
+    generate.add_argument("--senders", type=int, default=20)
+    generate.add_argument(
+        "--selected",
+        type=int,
+        default=5,
+        help="number of senders whose emails are selected",
+    )
+    generate.add_argument("--days", type=int, default=365)
+    generate.add_argument(
+        "--attachments",
+        type=float,
+        default=0.1,
+        help="proportion of emails with an attachment",
+    )
+    generate.add_argument(
+        "--attachment-size",
+        type=int,
+        default=50000,
+        help="average attachment size in bytes",
+    )
+    generate.add_argument("--mbox-files", type=int, default=1)
+    generate.add_argument(
+        "--mbox-bytes",
+        type=int,
+        default=None,
+        help="minimum size of each mbox file, overriding --emails for mbox",
+    )
+    generate.add_argument("--workers", type=int, default=None)
+    generate.add_argument(
+        "--headerindex",
+        action="store_true",
+        help="use a header index for the mail stores",
+    )
+    generate.add_argument("--seed", type=int, default=0)
+    generate.set_defaults(function=_generate)
+
+    measure = commands.add_parser(
+        "run", help="measure the mail stores in a corpus"
+    )
+    measure.add_argument("directory", help="corpus directory")
+    measure.add_argument("--repeat", type=int, default=3)
+    measure.add_argument(
+        "--store",
+        action="append",
+        choices=[name for name, _ in run.STORES],
+        help="mail store to measure, default all",
+    )
+    measure.add_argument("--output", help="file for results, default stdout")
+    measure.set_defaults(function=_run)
+
+    once = commands.add_parser("measure")
+    once.add_argument("directory")
+    once.add_argument("store", choices=[name for name, _ in run.STORES])
+    once.add_argument("--warm", action="store_true")
+    once.set_defaults(function=_measure)
+
+    compare = commands.add_parser("compare", help="compare two results files")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument(
+        "--threshold",
+        type=float,
+        default=run.REGRESSION_THRESHOLD,
+        help="proportional slowdown reported as a regression",
+    )
+    compare.set_defaults(function=_compare)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.function(args)
+    except (corpus.CorpusError, run.BenchmarkError) as exc:
+        sys.stderr.write(str(exc) + "\n")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
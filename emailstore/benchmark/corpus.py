@@ -0,0 +1,402 @@
+# corpus.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Generate synthetic mail stores for benchmarks.
+
+An Opera mail store, 'account/yyyy/mm/dd/N.mbs' files and an accounts.ini
+file, and a number of mbox files are generated from the same sequence of
+messages.  A configuration file for each mail store selects the emails from
+some of the senders, and a description of the corpus is written as JSON.
+
+The messages are generated from a seed so the same parameters always give
+the same corpus, and the results of benchmarks on different commits can be
+compared.
+
+"""
+
+import os
+import json
+import random
+import base64
+import datetime
+import email.utils
+
+# The configuration files written for each mail store.
+OPERA_CONF = "opera.conf"
+MBOX_CONF = "mbox.conf"
+
+# The description of the corpus.
+CORPUS_JSON = "corpus.json"
+
+# The directory holding the Opera mail store.
+OPERA_STORE = "opera"
+
+# The file holding the Opera account definitions.
+OPERA_ACCOUNTS = "accounts.ini"
+
+# The directory holding the mbox files.
+MBOX_STORE = "mbox"
+
+# The number of different attachments generated: messages with attachments
+# share these to keep generating a large corpus quick.
+_ATTACHMENT_VARIANTS = 8
+
+# The length of lines in base64 encoded attachments.
+_BASE64_LINE_LENGTH = 76
+
+# The date of the first message in the corpus.
+_START_DATE = datetime.datetime(
+    2014, 1, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=1))
+)
+
+
+class CorpusError(Exception):
+    """Exception class for corpus module."""
+
+
+def generate(
+    directory,
+    emails=1000,
+    accounts=2,
+    senders=20,
+    selected=5,
+    days=365,
+    attachments=0.1,
+    attachment_size=50000,
+    mbox_files=1,
+    mbox_bytes=None,
+    workers=None,
+    headerindex=False,
+    seed=0,
+):
+    """Generate mail stores in directory and return description of corpus.
+
+    directory - the directory, which must not exist, for the corpus
+    emails - the number of messages in each mail store
+    accounts - the number of Opera accounts
+    senders - the number of different sender addresses
+    selected - the number of senders whose emails are selected
+    days - the number of days over which the messages are spread
+    attachments - the proportion of messages with an attachment
+    attachment_size - the average size in bytes of an attachment
+    mbox_files - the number of mbox files
+    mbox_bytes - if not None, messages are added to each mbox file until it
+                 is at least this size, ignoring emails
+    workers - value of workers keyword in configuration files or None
+    headerindex - if True a headerindex keyword is put in the configuration
+                  files for both mail stores
+    seed - the seed for generating messages
+
+    """
+    if os.path.exists(directory):
+        raise CorpusError(directory + " already exists")
+
+    # The configuration files name the mail stores by absolute path so the
+    # corpus can be measured from any working directory.
+    directory = os.path.abspath(directory)
+    if not 0 < selected <= senders:
+        raise CorpusError("Selected senders must be between 1 and senders")
+    if emails < 1 or accounts < 1 or mbox_files < 1 or days < 1:
+        raise CorpusError("Emails, accounts, mbox files and days must be 1+")
+    sender_addresses = [
+        "".join(("sender", str(s), "@example.com")) for s in range(senders)
+    ]
+    variants = _attachment_variants(random.Random(seed), attachment_size)
+    os.makedirs(directory)
+    description = {
+        "parameters": {
+            "emails": emails,
+            "accounts": accounts,
+            "senders": senders,
+            "selected": selected,
+            "days": days,
+            "attachments": attachments,
+            "attachment_size": attachment_size,
+            "mbox_files": mbox_files,
+            "mbox_bytes": mbox_bytes,
+            "workers": workers,
+            "headerindex": headerindex,
+            "seed": seed,
+        },
+    }
+    interval = max(1, days * 86400 // emails)
+    description["opera"] = _write_opera_store(
+        directory,
+        _messages(
+            random.Random(seed),
+            emails,
+            interval,
+            sender_addresses,
+            attachments,
+            variants,
+        ),
+        accounts,
+    )
+    description["mbox"] = _write_mbox_files(
+        directory,
+        random.Random(seed),
+        emails,
+        interval,
+        sender_addresses,
+        attachments,
+        variants,
+        mbox_files,
+        mbox_bytes,
+    )
+    emailsfrom = sender_addresses[:selected]
+    extra = []
+    if workers is not None:
+        extra.append(("workers", str(workers)))
+    _write_configuration(
+        os.path.join(directory, OPERA_CONF),
+        [
+            ("mailboxstyle", "opera"),
+            ("operamailstore", os.path.join(directory, OPERA_STORE)),
+            ("operaaccountdefs", os.path.join(directory, OPERA_ACCOUNTS)),
+        ],
+        days,
+        emailsfrom,
+        "collected_opera",
+        extra + ([("headerindex", "headers.sqlite")] if headerindex else []),
+    )
+    _write_configuration(
+        os.path.join(directory, MBOX_CONF),
+        [("mailboxstyle", "mbox")]
+        + [("mboxmailstore", path) for path in description["mbox"]["files"]],
+        days,
+        emailsfrom,
+        "collected_mbox",
+        extra
+        + ([("headerindex", "mbox_headers.sqlite")] if headerindex else []),
+    )
+    with open(
+        os.path.join(directory, CORPUS_JSON), "w", encoding="utf8"
+    ) as file_open:
+        json.dump(description, file_open, indent=1, sort_keys=True)
+    return description
+
+
+def read_description(directory):
+    """Return description of corpus in directory written by generate()."""
+    try:
+        with open(
+            os.path.join(directory, CORPUS_JSON), "r", encoding="utf8"
+        ) as file_open:
+            return json.load(file_open)
+    except (OSError, ValueError) as exc:
+        raise CorpusError(
+            " ".join((directory, "is not a benchmark corpus:", str(exc)))
+        ) from exc
+
+
+def _attachment_variants(rng, attachment_size):
+    """Return list of base64 encoded attachments of about attachment_size."""
+    variants = []
+    for _ in range(_ATTACHMENT_VARIANTS):
+        size = max(1, int(attachment_size * rng.uniform(0.5, 1.5)))
+        encoded = base64.b64encode(rng.randbytes(size))
+        variants.append(
+            b"\n".join(
+                encoded[i : i + _BASE64_LINE_LENGTH]
+                for i in range(0, len(encoded), _BASE64_LINE_LENGTH)
+            )
+        )
+    return variants
+
+
+def _messages(rng, count, interval, senders, attachments, variants):
+    """Yield (date, sender, message) for count messages in date order.
+
+    count - number of messages, or None for no limit
+    interval - seconds between dates of successive messages
+
+    Each message is bytes with '\\n' line endings and no 'From ' line.
+
+    """
+    number = 0
+    while count is None or number < count:
+        date = _START_DATE + datetime.timedelta(seconds=number * interval)
+        sender = senders[rng.randrange(len(senders))]
+        number += 1
+        yield date, sender, _message(
+            rng, number, date, sender, attachments, variants
+        )
+
+
+def _message(rng, number, date, sender, attachments, variants):
+    """Return message number as bytes."""
+    headers = [
+        b"From: Sender <" + sender.encode() + b">",
+        b"To: owner@example.com",
+        b"Subject: Benchmark message " + str(number).encode(),
+        b"Date: " + email.utils.format_datetime(date).encode(),
+        b"Message-ID: <" + str(number).encode() + b"@benchmark.invalid>",
+        b"MIME-Version: 1.0",
+    ]
+    text = b"\n".join(
+        b" ".join(
+            b"word" + str(rng.randrange(1000)).encode() for _ in range(10)
+        )
+        for _ in range(rng.randrange(3, 30))
+    )
+
+    # A line starting 'From ' in the body must be quoted in mbox files.
+    text = b"\n".join((text, b"From the benchmark corpus."))
+    if rng.random() >= attachments:
+        headers.append(b"Content-Type: text/plain; charset=us-ascii")
+        return b"\n".join(headers) + b"\n\n" + text + b"\n"
+    boundary = b"benchmark-" + str(number).encode()
+    headers.append(
+        b'Content-Type: multipart/mixed; boundary="' + boundary + b'"'
+    )
+    return b"\n".join(
+        headers
+        + [
+            b"",
+            b"--" + boundary,
+            b"Content-Type: text/plain; charset=us-ascii",
+            b"",
+            text,
+            b"--" + boundary,
+            b"Content-Type: application/octet-stream",
+            b"Content-Transfer-Encoding: base64",
+            b'Content-Disposition: attachment; filename="data.bin"',
+            b"",
+            variants[rng.randrange(len(variants))],
+            b"--" + boundary + b"--",
+            b"",
+        ]
+    )
+
+
+def _from_line(date, sender):
+    """Return the 'From ' line which starts a message in a mail store."""
+    return b" ".join(
+        (
+            b"From",
+            sender.encode(),
+            date.strftime("%a %b %d %H:%M:%S %Y").encode(),
+        )
+    )
+
+
+def _write_opera_store(directory, messages, accounts):
+    """Write messages to Opera mail store and return description."""
+    store = os.path.join(directory, OPERA_STORE)
+    with open(
+        os.path.join(directory, OPERA_ACCOUNTS), "w", encoding="utf8"
+    ) as file_open:
+        file_open.write("[Accounts]\nCount=" + str(accounts) + "\n")
+        for account in range(1, accounts + 1):
+            file_open.write(
+                "".join(
+                    (
+                        "\n[Account",
+                        str(account),
+                        "]\nEmail=owner",
+                        str(account),
+                        "@example.com\n",
+                    )
+                )
+            )
+    count = 0
+    size = 0
+    for number, (date, sender, message) in enumerate(messages):
+        account = "".join(("account", str(number % accounts + 1)))
+        day = os.path.join(
+            store,
+            account,
+            date.strftime("%Y"),
+            date.strftime("%m"),
+            date.strftime("%d"),
+        )
+        os.makedirs(day, exist_ok=True)
+        data = b"\n".join((_from_line(date, sender), message))
+        with open(
+            os.path.join(day, "".join((str(number + 1), ".mbs"))), "wb"
+        ) as file_open:
+            file_open.write(data)
+        count += 1
+        size += len(data)
+    return {"emails": count, "bytes": size}
+
+
+def _write_mbox_files(
+    directory,
+    rng,
+    emails,
+    interval,
+    senders,
+    attachments,
+    variants,
+    mbox_files,
+    mbox_bytes,
+):
+    """Write messages to mbox files and return description.
+
+    The messages are shared between the files in date order, so each file
+    is an export of a period of time.  The messages are the ones put in the
+    Opera mail store unless mbox_bytes is given.
+
+    """
+    mbox_directory = os.path.join(directory, MBOX_STORE)
+    os.makedirs(mbox_directory)
+    if mbox_bytes is None:
+        messages = _messages(
+            rng, emails, interval, senders, attachments, variants
+        )
+        per_file = -(-emails // mbox_files)
+    else:
+        messages = _messages(
+            rng, None, interval, senders, attachments, variants
+        )
+        per_file = None
+    files = []
+    count = 0
+    size = 0
+    for mbox in range(1, mbox_files + 1):
+        path = os.path.join(
+            mbox_directory, "".join(("export", str(mbox), ".mbox"))
+        )
+        files.append(path)
+        written = 0
+        file_size = 0
+        with open(path, "wb") as file_open:
+            while True:
+                if per_file is not None and written >= per_file:
+                    break
+                if mbox_bytes is not None and file_size >= mbox_bytes:
+                    break
+                try:
+                    date, sender, message = next(messages)
+                except StopIteration:
+                    break
+                data = b"".join(
+                    (
+                        _from_line(date, sender),
+                        b"\n",
+                        message.replace(b"\nFrom ", b"\n>From "),
+                        b"\n",
+                    )
+                )
+                file_open.write(data)
+                written += 1
+                file_size += len(data)
+        count += written
+        size += file_size
+    return {"emails": count, "bytes": size, "files": files}
+
+
+def _write_configuration(path, store, days, emailsfrom, collected, extra):
+    """Write configuration file selecting emails from emailsfrom senders."""
+    last = _START_DATE + datetime.timedelta(days=days)
+    lines = list(store)
+    lines.append(("earliestfromdate", _START_DATE.strftime("%Y-%m-%d")))
+    lines.append(("mostrecentfromdate", last.strftime("%Y-%m-%d")))
+    lines.extend(("emailsfrom", sender) for sender in emailsfrom)
+    lines.append(("collected", collected))
+    lines.extend(extra)
+    with open(path, "w", encoding="utf8") as file_open:
+        file_open.write("\n".join(" ".join(line) for line in lines))
+        file_open.write("\n")
@@ -0,0 +1,288 @@
+# run.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Time the stages of collecting emails from a benchmark corpus.
+
+Each mail store in the corpus is measured in a new Python process, so the
+peak resident set size of one measurement is not hidden by an earlier one,
+and the times are not helped by objects kept from an earlier measurement.
+The operating system's file cache is not cleared between measurements.
+
+The stages timed are EmailCollector.parse, selected_emails,
+selected_emails_text, reading the Subject of each selected email, and
+copy_emails to an empty collected directory.
+
+The header index of a mail store, if the corpus has one, is deleted before
+each measurement so the measurements are comparable between commits.  If
+the corpus has header indexes each mail store is measured again with the
+header index made by the previous measurement, and reported as a separate
+mail store named like 'opera-warm'.
+
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import statistics
+import subprocess
+
+try:
+    import resource
+except ImportError:  # Not available on Microsoft Windows.
+    resource = None
+
+from ..core.emailcollector import EmailCollector
+from ..core.stats import CollectorStats
+from . import corpus
+
+# The stages timed, in the order they are done.
+STAGES = (
+    "parse",
+    "selected_emails",
+    "selected_emails_text",
+    "read_text",
+    "copy_emails",
+)
+
+# The mail stores in a corpus and their configuration files.
+STORES = (("opera", corpus.OPERA_CONF), ("mbox", corpus.MBOX_CONF))
+
+# The suffix of the name of a mail store measured with a header index made
+# by the previous measurement.
+WARM_SUFFIX = "-warm"
+
+# The proportion by which a median time must increase to be a regression.
+REGRESSION_THRESHOLD = 0.1
+
+
+class BenchmarkError(Exception):
+    """Exception class for run module."""
+
+
+def measure(directory, store, warm=False):
+    """Return dict of timings and counts for one run of store in directory.
+
+    directory - the benchmark corpus
+    store - 'opera' or 'mbox'
+    warm - if True the header index, if any, is kept from the previous run,
+           otherwise it is deleted before emails are selected
+
+    The collected directory is emptied before the emails are copied.
+
+    """
+    conf = dict(STORES)[store]
+    with open(
+        os.path.join(directory, conf), "r", encoding="utf8"
+    ) as file_open:
+        configuration = file_open.read()
+    collector = EmailCollector(
+        directory,
+        configuration=configuration,
+        dryrun=False,
+        stats=CollectorStats(),
+    )
+    seconds = {}
+    start = time.perf_counter()
+    if not collector.parse():
+        raise BenchmarkError("Configuration " + conf + " not valid")
+    seconds["parse"] = time.perf_counter() - start
+    headerindex = collector.criteria.get("headerindex")
+    if headerindex is not None and not warm:
+        headerindex = os.path.join(directory, headerindex)
+        if os.path.exists(headerindex):
+            os.remove(headerindex)
+    start = time.perf_counter()
+    selected = collector.selected_emails
+    seconds["selected_emails"] = time.perf_counter() - start
+    if selected is None:
+        raise BenchmarkError("No emails selected from " + conf)
+    start = time.perf_counter()
+    messages = collector.selected_emails_text
+    seconds["selected_emails_text"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for message in messages:
+        message.get("Subject")
+    seconds["read_text"] = time.perf_counter() - start
+    output = os.path.expanduser(collector.outputdirectory)
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+    start = time.perf_counter()
+    copied = collector.copy_emails()
+    seconds["copy_emails"] = time.perf_counter() - start
+    if copied is None:
+        raise BenchmarkError("Emails from " + conf + " not copied")
+    copied_bytes = sum(
+        entry.stat().st_size
+        for entry in os.scandir(output)
+        if entry.is_file() and entry.name.endswith(".mbs")
+    )
+    return {
+        "seconds": seconds,
+        "selected": len(selected),
+        "copied": copied,
+        "copied_bytes": copied_bytes,
+        "peak_rss": peak_rss(),
+        "stats": collector.stats.as_dict(),
+    }
+
+
+def peak_rss():
+    """Return dict of peak resident set sizes in bytes of process and children.
+
+    The 'self' value is the peak of this process, and the 'children' value
+    is the largest peak of the worker processes.  The two are not added
+    because they need not happen at the same time.
+
+    None is returned if the resource module is not available.
+
+    """
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": scale * resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": scale
+        * resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+def run(directory, repeat=3, stores=None):
+    """Return results of repeat measurements of stores in directory.
+
+    stores - names of mail stores to measure, default all in STORES
+
+    """
+    description = corpus.read_description(directory)
+    if stores is None:
+        stores = [name for name, _ in STORES]
+    results = {
+        "environment": environment(),
+        "corpus": description["parameters"],
+        "stores": {},
+    }
+    warm = description["parameters"].get("headerindex")
+    for store in stores:
+        cold_runs = []
+        warm_runs = []
+        for _ in range(repeat):
+            cold_runs.append(_measure_in_process(directory, store))
+            if warm:
+                warm_runs.append(
+                    _measure_in_process(directory, store, warm=True)
+                )
+        results["stores"][store] = _summarize(description[store], cold_runs)
+        if warm_runs:
+            results["stores"][store + WARM_SUFFIX] = _summarize(
+                description[store], warm_runs
+            )
+    return results
+
+
+def _measure_in_process(directory, store, warm=False):
+    """Return measure(directory, store, warm) done in a new Python process."""
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "emailstore.benchmark",
+            "measure",
+            directory,
+            store,
+        ]
+        + (["--warm"] if warm else []),
+        stdout=subprocess.PIPE,
+        check=False,
+    )
+    if completed.returncode:
+        raise BenchmarkError("Measurement of " + store + " failed")
+    return json.loads(completed.stdout)
+
+
+def _summarize(store, runs):
+    """Return summary of runs of measure() on store described by store."""
+    seconds = {
+        stage: statistics.median(r["seconds"][stage] for r in runs)
+        for stage in STAGES
+    }
+    select = seconds["selected_emails"]
+    copy = seconds["copy_emails"]
+    copied_bytes = runs[-1]["copied_bytes"]
+    rss = [r["peak_rss"] for r in runs if r["peak_rss"] is not None]
+    if rss:
+        rss = {key: max(r[key] for r in rss) for key in rss[0]}
+    return {
+        "emails": store["emails"],
+        "bytes": store["bytes"],
+        "selected": runs[-1]["selected"],
+        "copied": runs[-1]["copied"],
+        "copied_bytes": copied_bytes,
+        "runs": len(runs),
+        "seconds": seconds,
+        "throughput": {
+            "emails_scanned_per_second": (
+                store["emails"] / select if select else None
+            ),
+            "bytes_scanned_per_second": (
+                store["bytes"] / select if select else None
+            ),
+            "bytes_copied_per_second": (copied_bytes / copy if copy else None),
+        },
+        "peak_rss": rss or None,
+        "stats": runs[-1]["stats"],
+    }
+
+
+def environment():
+    """Return description of the Python, platform, and commit measured."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processors": os.cpu_count(),
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Return list of (store, stage, baseline, current, regression) tuples.
+
+    baseline, current - results returned by run()
+    threshold - proportional increase in a median time which is reported
+                as a regression
+
+    Only stores and stages in both results are compared.  Results for
+    different corpus parameters are not comparable.
+
+    """
+    if baseline["corpus"] != current["corpus"]:
+        raise BenchmarkError("Results are for different corpora")
+    comparison = []
+    for store, summary in current["stores"].items():
+        if store not in baseline["stores"]:
+            continue
+        base_seconds = baseline["stores"][store]["seconds"]
+        for stage in STAGES:
+            if stage not in base_seconds or stage not in summary["seconds"]:
+                continue
+            before = base_seconds[stage]
+            after = summary["seconds"][stage]
+            comparison.append(
+                (store, stage, before, after, after > before * (1 + threshold))
+            )
+    return comparison
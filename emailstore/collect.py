@@ -0,0 +1,214 @@
+# collect.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Select and copy emails without a user interface.
+
+Run as 'python -m emailstore.collect <path to collected.conf>' to select the
+emails described in the configuration file and report what would be copied,
+or with the --apply option to copy them.
+
+Progress is written to standard output as one JSON object per line, so the
+collection can be run as a batch job and monitored or measured.  The fields
+are:
+
+event - 'select', 'copy', 'message', or 'done'
+elapsed - seconds since the collection started
+scanned - number of emails examined during selection
+matched - number of emails selected
+copied - number of emails copied
+bytes - number of bytes copied
+bytes_per_second - bytes copied per second since copying started
+title, message - text of a problem report
+
+With the --stats option the counts and times of the stages of collecting
+emails, see the emailstore.core.stats module, are written to a JSON file.
+
+tkinter is not imported.
+
+"""
+
+import sys
+import os
+import argparse
+import json
+import time
+
+from .core.emailcollector import EmailCollector, EmailCollectorError
+from .core.reporter import Reporter
+from .core.stats import CollectorStats
+
+# Minimum seconds between progress lines for one stage.
+_PROGRESS_INTERVAL = 1.0
+
+
+class _JSONReporter(Reporter):
+    """Write progress and problem reports as JSON lines to a stream."""
+
+    def __init__(self, stream, interval=_PROGRESS_INTERVAL):
+        """Note stream for reports and minimum interval between reports."""
+        self.stream = stream
+        self.interval = interval
+        self.start = time.monotonic()
+        self.counts = {}
+        self._copy_start = None
+        self._last_report = {}
+        self.messages = []
+
+    def _write(self, event, **fields):
+        """Write event and fields as a JSON line."""
+        record = {
+            "event": event,
+            "elapsed": round(time.monotonic() - self.start, 3),
+        }
+        record.update(fields)
+        self.stream.write(json.dumps(record))
+        self.stream.write("\n")
+        self.stream.flush()
+
+    def information(self, title, message):
+        """Report a problem found by the collector."""
+        self.messages.append((title, message))
+        self._write("message", title=title, message=message.strip())
+
+    def progress(self, stage, **counts):
+        """Note counts for stage and report them if interval has passed."""
+        now = time.monotonic()
+        if stage == "copy" and self._copy_start is None:
+            self._copy_start = now
+        self.counts.update(counts)
+        if now - self._last_report.get(stage, self.start) < self.interval:
+            return
+        self._last_report[stage] = now
+        self.report(stage)
+
+    def report(self, event, **fields):
+        """Write event with the counts so far and fields."""
+        counts = dict(self.counts)
+        if self._copy_start is not None:
+            seconds = time.monotonic() - self._copy_start
+            if seconds > 0:
+                counts["bytes_per_second"] = round(
+                    counts.get("bytes", 0) / seconds
+                )
+        counts.update(fields)
+        self._write(event, **counts)
+
+
+def _pending_emails(collector):
+    """Return count of selected emails not in the collected directory."""
+    directory = collector.outputdirectory
+    if os.path.isdir(directory):
+        exist = set(os.listdir(directory))
+    else:
+        exist = set()
+    exclude = collector.excluded_emails
+    filename_map = collector.filename_map
+    pending = 0
+    for email in collector.selected_emails:
+        if isinstance(email[-1], str):
+            filename = filename_map.get(email[-1])
+        else:
+            filename = email[0]
+        if filename is None or filename in exclude or filename in exist:
+            continue
+        pending += 1
+    return pending
+
+
+def collect(conf, apply=False, stream=None, stats=None):
+    """Select, and copy if apply is True, emails described in conf.
+
+    conf - path of configuration file, usually named collected.conf
+    stream - the stream for JSON progress lines, default sys.stdout
+    stats - path of file for counts and times of stages as JSON, or None
+
+    Return 0 if successful, 1 if not.
+
+    """
+    reporter = _JSONReporter(sys.stdout if stream is None else stream)
+    try:
+        with open(conf, "r", encoding="utf8") as file_open:
+            configuration = file_open.read()
+    except OSError as exc:
+        reporter.information("Configuration", str(exc))
+        reporter.report("done", ok=False)
+        return 1
+    collector = EmailCollector(
+        os.path.dirname(os.path.abspath(conf)),
+        configuration=configuration,
+        dryrun=not apply,
+        reporter=reporter,
+        stats=None if stats is None else CollectorStats(),
+    )
+    try:
+        return _collect(collector, conf, apply, reporter)
+    finally:
+        if stats is not None:
+            collector.stats.write_json(stats)
+
+
+def _collect(collector, conf, apply, reporter):
+    """Select, and copy if apply is True, emails with collector."""
+    if not collector.parse():
+        reporter.information("Configuration", "Format error in " + conf)
+        reporter.report("done", ok=False)
+        return 1
+    try:
+        if collector.selected_emails is None:
+            reporter.information(
+                "Configuration", "Mailbox style not recognised"
+            )
+            reporter.report("done", ok=False)
+            return 1
+        reporter.report("select")
+        if not apply:
+            reporter.report(
+                "done", ok=True, pending=_pending_emails(collector)
+            )
+            return 0
+        copied = collector.copy_emails()
+    except EmailCollectorError as exc:
+        reporter.information("Collect Emails", str(exc))
+        reporter.report("done", ok=False)
+        return 1
+    if copied is None:
+        reporter.report("done", ok=False)
+        return 1
+    reporter.progress("copy", copied=copied)
+    reporter.report("done", ok=True)
+    return 0
+
+
+def main(argv=None):
+    """Run collect() with arguments from command line."""
+    parser = argparse.ArgumentParser(
+        prog="python -m emailstore.collect",
+        description="Select and copy emails described in a configuration.",
+    )
+    parser.add_argument("conf", help="path of configuration file")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--dry-run",
+        dest="apply",
+        action="store_false",
+        help="select emails and report what would be copied (default)",
+    )
+    mode.add_argument(
+        "--apply",
+        dest="apply",
+        action="store_true",
+        help="select emails and copy them",
+    )
+    parser.set_defaults(apply=False)
+    parser.add_argument(
+        "--stats",
+        metavar="PATH",
+        help="write counts and times of stages to PATH as JSON",
+    )
+    args = parser.parse_args(argv)
+    return collect(args.conf, apply=args.apply, stats=args.stats)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,17 +19,42 @@ import os
 from datetime import date
 import re
 from email import message_from_binary_file
+from email.parser import BytesHeaderParser
 from email.utils import parseaddr, parsedate_tz
 from email.message import EmailMessage
 from email.generator import BytesGenerator
-from mailbox import mbox, mboxMessage, NoSuchMailboxError
-import filecmp
+from mailbox import mboxMessage
+import shutil
+import functools
+import itertools
+import threading
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from time import strftime
 from io import BytesIO
-import tkinter.messagebox
 
 from solentware_misc.core.utilities import AppSysDate
 
+from .headerindex import HeaderIndex, HeaderIndexError
+from .mboxindex import (
+    scan_mbox,
+    scan_mbox_mmap,
+    MboxMap,
+    date_blocks,
+    block_ranges,
+)
+from .manifest import (
+    Manifest,
+    MANIFEST,
+    PARTIAL_PREFIX,
+    file_digest,
+    bytes_digest,
+)
+from .reporter import LoggingReporter
+from .lazymessage import LazyMessage, MessageCache
+from .stats import NullStats
+from .fastheaders import selection_headers
+
 
 # The name of the configuration file for selecting emails from a mbox.
 COLLECTED_CONF = "collected.conf"
@@ -46,6 +71,12 @@ _ACCOUNT = "account"
 _EMAILS_FROM = "emailsfrom"
 COLLECTED = "collected"
 EXCLUDE_EMAIL = "exclude"
+_HEADER_INDEX = "headerindex"
+_MBOX_SCANNER = "mboxscanner"
+_MBOX_SCANNER_MMAP = "mmap"
+_MBOX_SCANNER_READLINE = "readline"
+_WORKERS = "workers"
+_CHECKPOINT = "checkpoint"
 _CONF_KEYWORDS = {
     _MAILBOX_STYLE: (_MAILBOX_STYLE, None),
     _OPERA_MAIL_STORE: ("mailstore", None),
@@ -57,13 +88,46 @@ _CONF_KEYWORDS = {
     _EMAILS_FROM: ("emailsfrom", set),
     COLLECTED: ("collected", None),
     EXCLUDE_EMAIL: (EXCLUDE_EMAIL, set),
+    _HEADER_INDEX: (_HEADER_INDEX, None),
+    _MBOX_SCANNER: (_MBOX_SCANNER, None),
+    _WORKERS: (_WORKERS, None),
+    _CHECKPOINT: (_CHECKPOINT, None),
 }
 
+# The number of email files whose headers are read in one batch, possibly
+# by several worker processes.
+_HEADER_BATCH_SIZE = 1000
+
+# The number of selected emails passed to the event loop at a time by
+# EmailCollector.aiter_selected().
+_ASYNC_BATCH_SIZE = 100
+
 
 class EmailCollectorError(Exception):
     """Exception class for EmailCollector."""
 
 
+class EmailCollectorCancelled(EmailCollectorError):
+    """Exception raised when a selection or copy is cancelled."""
+
+
+def _get_workers(workers):
+    """Return number of worker processes given workers argument."""
+    if workers is None:
+        return 1
+    try:
+        workers = int(workers)
+    except ValueError:
+        raise EmailCollectorError(
+            "Workers argument must be a positive integer"
+        ) from None
+    if workers < 1:
+        raise EmailCollectorError(
+            "Workers argument must be a positive integer"
+        )
+    return workers
+
+
 class EmailCollector:
     """Extract emails matching selection criteria from email client store.
 
@@ -93,7 +157,15 @@ class EmailCollector:
     )
 
     def __init__(
-        self, directory, configuration=None, dryrun=True, parent=None
+        self,
+        directory,
+        configuration=None,
+        dryrun=True,
+        parent=None,
+        reporter=None,
+        cancelled=None,
+        stats=None,
+        mp_context=None,
     ):
         """Define the email extraction rules from configuration.
 
@@ -102,14 +174,30 @@ class EmailCollector:
         dryrun - True: report proposed actions
                  False; do proposed actions after confirmation
         parent - parent widget for dialogues
+        reporter - Reporter instance told about problems and progress, by
+                   default a LoggingReporter
+        stats - CollectorStats instance recording counts and timings of the
+                stages of collecting emails, by default a NullStats
+        mp_context - multiprocessing context used to start worker processes,
+                     by default the default context.  A 'spawn' context is
+                     needed if the process has threads, such as a GUI.
 
         """
         self.directory = directory
         self.configuration = configuration
         self.dryrun = dryrun
         self.parent = parent
+        if reporter is None:
+            reporter = LoggingReporter()
+        self.reporter = reporter
+        if stats is None:
+            stats = NullStats()
+        self.stats = stats
+        self.mp_context = mp_context
         self.criteria = None
         self.email_client = None
+        self._cancelled = threading.Event()
+        self._executor = None
 
     def parse(self):
         """Parse configuration file and return True if successful.
@@ -141,21 +229,40 @@ class EmailCollector:
 
     def _select_emails(self):
         """Select and return list of emails or None."""
-        if self.criteria is None:
+        if not self._create_email_client():
             return None
+        return self.email_client.selected_emails
+
+    def _create_email_client(self):
+        """Create email client for criteria and return True if created."""
+        if self.criteria is None:
+            return False
         if _MAILBOX_STYLE not in self.criteria:
-            return None
+            return False
+        self.release_maps()
         if self.criteria[_MAILBOX_STYLE].lower() == _OPERA_EMAIL_CLIENT:
             self.email_client = _OperaEmailClient(
-                self.directory, self.parent, **self.criteria
+                self.directory,
+                self.parent,
+                reporter=self.reporter,
+                cancelled=self._cancelled,
+                stats=self.stats,
+                mp_context=self.mp_context,
+                **self.criteria
             )
         elif self.criteria[_MAILBOX_STYLE].lower() == _MBOX_FORMAT:
             self.email_client = _MboxEmail(
-                self.directory, self.parent, **self.criteria
+                self.directory,
+                self.parent,
+                reporter=self.reporter,
+                cancelled=self._cancelled,
+                stats=self.stats,
+                mp_context=self.mp_context,
+                **self.criteria
             )
         else:
-            return None
-        return self.email_client.selected_emails
+            return False
+        return True
 
     @property
     def selected_emails(self):
@@ -164,6 +271,24 @@ class EmailCollector:
             return self.email_client.selected_emails
         return self._select_emails()
 
+    def iter_selected(self, keep=False):
+        """Yield (filename, source, message) for each selected email.
+
+        filename - the name of the email's file in the output directory
+        source - the location of the email in the mail store
+        message - a LazyMessage which reads the email when used
+        keep - if True the selection is kept, as if selected_emails had
+               been used, once all the selected emails have been yielded
+
+        Nothing is yielded if the configuration does not describe a mail
+        store.  By default the selection is not kept.
+
+        """
+        if not self.email_client:
+            if not self._create_email_client():
+                return
+        yield from self.email_client.iter_selected(keep=keep)
+
     @property
     def selected_emails_text(self):
         """Return text extracted from selected emails."""
@@ -194,6 +319,16 @@ class EmailCollector:
                 return None
         return self.email_client.filename_map
 
+    def message_filename(self, message):
+        """Return filename in output directory of selected email message.
+
+        message - a LazyMessage from selected_emails_text or iter_selected
+
+        None is returned if the email has no filename.
+
+        """
+        return self.email_client.message_filename(message)
+
     def copy_emails(self):
         """Copy selected email files to directory and return count or None."""
         if not self.email_client:
@@ -201,6 +336,99 @@ class EmailCollector:
                 return None
         return self.email_client.copy_emails_to_directory()
 
+    def release_maps(self):
+        """Close the memory maps of mail store files held by email client.
+
+        The maps are created again when needed.  A map of a mbox file
+        changed since it was mapped must not be used because reading the
+        map can raise SIGBUS if the file has been truncated.
+
+        """
+        if self.email_client:
+            self.email_client.release_maps()
+
+    def cancel(self):
+        """Cancel the selection or copy being done, perhaps in another thread.
+
+        The action raises EmailCollectorCancelled at the next email, or next
+        batch of emails, it reads or writes.  If no action is being done the
+        next one is cancelled.
+
+        """
+        self._cancelled.set()
+
+    def clear_cancel(self):
+        """Forget a cancel made too late to stop the action being done."""
+        self._cancelled.clear()
+
+    async def _run_in_executor(self, function, executor):
+        """Return function() run in executor without blocking event loop.
+
+        executor - a concurrent.futures.ThreadPoolExecutor or None.  If None
+                   a single thread owned by this EmailCollector is used so at
+                   most one action is done at a time for each EmailCollector.
+                   A ProcessPoolExecutor cannot be used because function
+                   works on this EmailCollector, which cannot be pickled.
+
+        If the awaiting task is cancelled the action is cancelled too.
+
+        """
+        if executor is None:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="emailcollector"
+                )
+            executor = self._executor
+        future = executor.submit(function)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            if not future.cancel():
+                self.cancel()
+
+                # The action may have finished, or be past it's last look
+                # at the cancel, so the cancel must not outlive it.
+                future.add_done_callback(lambda f: self.clear_cancel())
+            raise
+
+    async def aselected_emails(self, executor=None):
+        """Return list of selected emails without blocking event loop."""
+        return await self._run_in_executor(
+            lambda: self.selected_emails, executor
+        )
+
+    async def acopy_emails(self, executor=None):
+        """Copy selected emails without blocking event loop.
+
+        Return count of emails copied or None.
+
+        """
+        return await self._run_in_executor(self.copy_emails, executor)
+
+    async def aiter_selected(self, executor=None):
+        """Yield iter_selected() items without blocking event loop.
+
+        The items are taken from iter_selected() in batches by executor.
+        Reading a message blocks, so use the message attribute of the
+        LazyMessage in an executor too if the email may be large.
+
+        """
+        iterator = self.iter_selected()
+        try:
+            while True:
+                batch = await self._run_in_executor(
+                    functools.partial(
+                        _next_batch, iterator, _ASYNC_BATCH_SIZE
+                    ),
+                    executor,
+                )
+                if not batch:
+                    return
+                for item in batch:
+                    yield item
+        finally:
+            await self._run_in_executor(iterator.close, executor)
+
     def exclude_email(self, filename):
         """Ensure filename is in the set to be excluded."""
         if self.email_client.exclude is None:
@@ -211,7 +439,183 @@ class EmailCollector:
         """Ensure filename is not in the set to be excluded."""
         if self.email_client.exclude is None:
             self.email_client.exclude = set()
-        self.email_client.exclude.remove(filename)
+        self.email_client.exclude.discard(filename)
+
+
+def _next_batch(iterator, size):
+    """Return list of up to size items taken from iterator."""
+    return list(itertools.islice(iterator, size))
+
+
+def _check_cancelled(cancelled):
+    """Raise EmailCollectorCancelled, and clear cancelled, if it is set.
+
+    cancelled - a threading.Event
+
+    """
+    if cancelled.is_set():
+        cancelled.clear()
+        raise EmailCollectorCancelled("Selection or copy cancelled")
+
+
+def _read_header_bytes(file_open):
+    """Return bytes read from file_open up to the blank line after headers."""
+    lines = []
+    for line in file_open:
+        lines.append(line)
+        if line in (b"\n", b"\r\n"):
+            break
+    return b"".join(lines)
+
+
+def _get_opera_email_headers(path):
+    """Return (sender, date, messageid, filename) for Opera email at path.
+
+    The filename is None if the From or Date headers are not usable.
+
+    """
+    with open(path, "rb") as file_open:
+        return _get_header_bytes_headers(_read_header_bytes(file_open))
+
+
+def _get_mbox_email_headers(header_bytes):
+    """Return (sender, date, messageid, filename) for mbox email headers.
+
+    header_bytes may be a bytes object or a memoryview.
+
+    The filename is None if the From or Date headers are not usable.
+
+    """
+    return _get_header_bytes_headers(bytes(header_bytes))
+
+
+def _get_header_bytes_headers(header_bytes):
+    """Return (sender, date, messageid, filename) for header_bytes.
+
+    The fast byte level extractor is used unless it cannot be sure of
+    giving the answer the email package gives, when the headers are parsed
+    by the email package.
+
+    """
+    headers = selection_headers(header_bytes)
+    if headers is not None:
+        return headers
+    return _get_selection_headers(
+        BytesHeaderParser(_class=_MessageFile).parsebytes(header_bytes)
+    )
+
+
+def _get_selection_headers(message):
+    """Return (sender, date, messageid, filename) for message."""
+    return (
+        parseaddr(message.get("From"))[-1],
+        message.get("Date"),
+        message.get("Message-ID"),
+        message.generate_filename() or None,
+    )
+
+
+def _scan_directories(path, stats):
+    """Return os.DirEntry for each directory in path in reverse name order.
+
+    stats - CollectorStats instance counting the directories listed
+
+    """
+    with os.scandir(path) as entries:
+        directories = [e for e in entries if e.is_dir()]
+    stats.count("directories_listed")
+    directories.sort(key=lambda e: e.name, reverse=True)
+    return directories
+
+
+def _list_collected(directory):
+    """Return set of collected email filenames in directory."""
+    return {
+        name
+        for name in os.listdir(directory)
+        if not name.startswith(PARTIAL_PREFIX) and name != MANIFEST
+    }
+
+
+def _copy_file_atomic(source, target):
+    """Copy source file to target replacing target when copy is complete.
+
+    shutil.copyfile streams the copy, using the operating system's zero copy
+    calls where available, so the email is not read into memory.
+
+    """
+    partial = os.path.join(
+        os.path.dirname(target),
+        "".join((PARTIAL_PREFIX, os.path.basename(target))),
+    )
+    try:
+        shutil.copyfile(source, partial)
+        os.replace(partial, target)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def _write_file_atomic(data, target):
+    """Write data to target replacing target when write is complete."""
+    partial = os.path.join(
+        os.path.dirname(target),
+        "".join((PARTIAL_PREFIX, os.path.basename(target))),
+    )
+    try:
+        with open(partial, "wb") as file_open:
+            file_open.write(data)
+        os.replace(partial, target)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def _opera_file_number(name):
+    """Return the number in Opera email filename, like '123.mbs', or -1."""
+    try:
+        return int(os.path.splitext(name)[0])
+    except ValueError:
+        return -1
+
+
+def _mbox_source(entry):
+    """Return identity of message at MboxEntry entry for a Manifest."""
+    return "".join(
+        (entry.mailstore, "[", str(entry.start), ":", str(entry.stop), "]")
+    )
+
+
+def _scan_mbox_file(mailstore, mboxscanner, ranges=None):
+    """Return list of MboxEntry instances for messages in mailstore.
+
+    ranges - list of (begin, end) byte ranges to scan, or None to scan the
+             whole file
+
+    This function is run by worker processes, so a memory map used to scan
+    mailstore is released before returning.
+
+    """
+    if ranges is None:
+        ranges = [(0, None)]
+    entries = []
+    if mboxscanner == _MBOX_SCANNER_READLINE:
+        for begin, end in ranges:
+            entries.extend(
+                scan_mbox(mailstore, _get_mbox_email_headers, begin, end)
+            )
+        return entries
+    mboxmap = MboxMap(mailstore)
+    try:
+        for begin, end in ranges:
+            entries.extend(
+                scan_mbox_mmap(mboxmap, _get_mbox_email_headers, begin, end)
+            )
+        return entries
+    finally:
+        mboxmap.close()
 
 
 class _MessageFile(EmailMessage):
@@ -293,6 +697,10 @@ class _OperaEmailClient:
         )
     )
 
+    # Account maps read from accounts.ini files, keyed by path, with the
+    # modification time and size of the file when read.
+    _accounts_cache = {}
+
     def __init__(
         self,
         directory,
@@ -306,6 +714,14 @@ class _OperaEmailClient:
         collected=None,
         exclude=None,
         mailboxstyle=_OPERA_EMAIL_CLIENT,
+        headerindex=None,
+        mboxscanner=None,
+        workers=None,
+        checkpoint=None,
+        reporter=None,
+        cancelled=None,
+        stats=None,
+        mp_context=None,
     ):
         """Define the email extraction rules from configuration.
 
@@ -318,12 +734,32 @@ class _OperaEmailClient:
         collected - directory to which email files are copied
         exclude - iterable of email filenames to be ignored when copying
         mailboxstyle - must be 'opera' ignoring case
+        headerindex - file caching headers of email files between runs
+        mboxscanner - ignored
+        workers - number of processes reading email headers, default 1
+        checkpoint - file recording newest email seen in each account when
+                     emails were last copied: older emails are ignored
+        reporter - Reporter instance told about problems and progress
+        cancelled - threading.Event set to cancel selection or copy
+        stats - CollectorStats instance recording counts and timings
+        mp_context - multiprocessing context for worker processes or None
 
         See AppSysDate for accepted date formats.  Preferred are '30 Nov 2006'
         and '2006-11-30'.
 
         """
+        del mboxscanner
         self.parent = parent
+        if reporter is None:
+            reporter = LoggingReporter()
+        self.reporter = reporter
+        if cancelled is None:
+            cancelled = threading.Event()
+        self.cancelled = cancelled
+        if stats is None:
+            stats = NullStats()
+        self.stats = stats
+        self.mp_context = mp_context
         if mailboxstyle.lower() != _OPERA_EMAIL_CLIENT:
             raise EmailCollectorError("Mailbox style expected to be Opera")
         if mailstore is None:
@@ -358,8 +794,7 @@ class _OperaEmailClient:
             self.mostrecentdate = mostrecentdate
         self.emailsfrom = emailsfrom
         if collected is None:
-            tkinter.messagebox.showinfo(
-                parent=self.parent,
+            self.reporter.information(
                 title="Collect Emails",
                 message="".join(
                     (
@@ -373,6 +808,21 @@ class _OperaEmailClient:
             collected = COLLECTED
         self.outputdirectory = os.path.join(directory, collected)
         self.exclude = exclude
+        if headerindex is not None:
+            headerindex = os.path.join(
+                directory, os.path.expanduser(os.path.expandvars(headerindex))
+            )
+        self.headerindex = headerindex
+        self.workers = _get_workers(workers)
+        if checkpoint is not None:
+            checkpoint = os.path.join(
+                directory, os.path.expanduser(os.path.expandvars(checkpoint))
+            )
+        self.checkpoint = checkpoint
+        self._newest_seen = {}
+        self._header_index = None
+        self._selected_headers = {}
+        self._message_cache = MessageCache()
         self._selected_emails = None
         self._selected_emails_text = None
         self._filename_map = None
@@ -413,12 +863,19 @@ class _OperaEmailClient:
         # used again if an account is deleted.
         # int(<digits>) > unique integer where n2 stored after n1 if n2 > n1
         # A (send date, sender) is assumed to refer to one file.
+        # If a checkpoint is used, day directories older than the newest
+        # email seen in the account when emails were last copied are not
+        # searched, nor are files in that day stored before the newest email.
 
+        checkpoint = self.read_checkpoint()
+        newest_seen = {}
         emails = []
+        stats = self.stats
         try:
             mailstore = self.mailstore
             accounts = self.get_accounts()
-            for account in os.listdir(mailstore):
+            for account_entry in _scan_directories(mailstore, stats):
+                account = account_entry.name
 
                 # Ignore directories not mentioned in accounts.ini
                 if account not in accounts:
@@ -433,21 +890,34 @@ class _OperaEmailClient:
                 # mostrecentdate argument in _OperaEmailClient() was None
                 amrd = mrd
                 aed = ymd
-
-                years = sorted(
-                    os.listdir(os.path.join(mailstore, account)), reverse=True
-                )
-                for year in years:
-                    for month in sorted(
-                        os.listdir(os.path.join(mailstore, account, year)),
-                        reverse=True,
+                acp, acpn = checkpoint.get(account, (None, None))
+
+                # Year and month directories outside the date range, once it
+                # is known, are not listed.
+                for year_entry in _scan_directories(account_entry.path, stats):
+                    year = year_entry.name
+                    ey = (int(year),)
+                    if aed is not None and ey < aed[:1]:
+                        break
+                    if acp is not None and ey < acp[:1]:
+                        break
+                    if amrd is not None and ey > amrd[:1]:
+                        continue
+                    for month_entry in _scan_directories(
+                        year_entry.path, stats
                     ):
-                        for day in sorted(
-                            os.listdir(
-                                os.path.join(mailstore, account, year, month)
-                            ),
-                            reverse=True,
+                        month = month_entry.name
+                        eym = ey + (int(month),)
+                        if aed is not None and eym < aed[:2]:
+                            break
+                        if acp is not None and eym < acp[:2]:
+                            break
+                        if amrd is not None and eym > amrd[:2]:
+                            continue
+                        for day_entry in _scan_directories(
+                            month_entry.path, stats
                         ):
+                            day = day_entry.name
                             if amrd is None:
                                 amrd = tuple(
                                     int(v) for v in (year, month, day)
@@ -456,11 +926,29 @@ class _OperaEmailClient:
                                 aed = tuple(
                                     [int(year) - 1, int(month), int(day)]
                                 )
-                            emd = (int(year), int(month), int(day))
+                            emd = eym + (int(day),)
                             if emd < aed:
                                 break
                             if emd > amrd:
                                 continue
+                            if acp is not None and emd < acp:
+                                break
+                            _check_cancelled(self.cancelled)
+                            names = self._list_day_directory(day_entry)
+                            if names:
+                                newest = max(
+                                    (emd, _opera_file_number(e)) for e in names
+                                )
+                                if newest > newest_seen.get(account, newest):
+                                    newest_seen[account] = newest
+                                else:
+                                    newest_seen.setdefault(account, newest)
+                            if emd == acp:
+                                names = [
+                                    e
+                                    for e in names
+                                    if _opera_file_number(e) > acpn
+                                ]
                             emails.extend(
                                 [
                                     (
@@ -475,15 +963,7 @@ class _OperaEmailClient:
                                             e,
                                         ),
                                     )
-                                    for e in os.listdir(
-                                        os.path.join(
-                                            mailstore,
-                                            account,
-                                            year,
-                                            month,
-                                            day,
-                                        )
-                                    )
+                                    for e in names
                                 ]
                             )
                         else:
@@ -508,9 +988,121 @@ class _OperaEmailClient:
                 "Exception before any emails collected."
             ) from None
         emails.sort()
+        self._newest_seen = newest_seen
         return [e[-1] for e in emails]
 
+    def release_maps(self):
+        """Do nothing because Opera mail store files are not memory mapped."""
+
+    def _list_day_directory(self, day_entry):
+        """Return names of email files in day directory at day_entry.
+
+        day_entry - an os.DirEntry for a yyyy/mm/dd directory in mail store
+
+        The header index, if open, holds the names in each day directory
+        listed by earlier selections, which are used while the directory's
+        modification time is unchanged.
+
+        """
+        stats = self.stats
+        header_index = self._header_index
+        if header_index is not None:
+            stat_result = day_entry.stat()
+            names = header_index.get_names(day_entry.path, stat_result)
+            if names is not None:
+                stats.count("directory_cache_hits")
+                return names
+        with os.scandir(day_entry.path) as entries:
+            names = [e.name for e in entries if e.is_file()]
+        stats.count("directories_listed")
+        stats.count("files_listed", len(names))
+        if header_index is not None:
+            header_index.put_names(day_entry.path, stat_result, names)
+        return names
+
+    def read_checkpoint(self):
+        """Return dict of account: ((yyyy, mm, dd), number) from checkpoint.
+
+        Each line in the checkpoint file is '<account> <yyyy-mm-dd> <number>'
+        where number is the number in the name of the newest email file
+        seen in the account's yyyy/mm/dd directory when emails were copied.
+
+        An empty dict is returned if there is no checkpoint file.
+
+        """
+        checkpoint = {}
+        if self.checkpoint is None:
+            return checkpoint
+        try:
+            with open(self.checkpoint, "r", encoding="utf8") as file_open:
+                for line in file_open:
+                    line = line.split("#", 1)[0].strip()
+                    if not line:
+                        continue
+                    account, ymd, number = line.split()
+                    ymd = tuple(int(d) for d in ymd.split("-"))
+                    date(*ymd)
+                    checkpoint[account] = (ymd, int(number))
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            raise EmailCollectorError(
+                "".join(("Format error in checkpoint file ", self.checkpoint))
+            ) from None
+        return checkpoint
+
+    def write_checkpoint(self):
+        """Record newest email seen in each account in checkpoint file."""
+        if self.checkpoint is None:
+            return
+        checkpoint = self.read_checkpoint()
+        for account, newest in self._newest_seen.items():
+            if newest > checkpoint.get(account, newest):
+                checkpoint[account] = newest
+            else:
+                checkpoint.setdefault(account, newest)
+        _write_file_atomic(
+            "".join(
+                "".join(
+                    (
+                        account,
+                        " ",
+                        "-".join(format(d, "02") for d in ymd),
+                        " ",
+                        str(number),
+                        "\n",
+                    )
+                )
+                for account, (ymd, number) in sorted(checkpoint.items())
+            ).encode("utf8"),
+            self.checkpoint,
+        )
+
     def get_accounts(self):
+        """Return account names associated with owner's email addresses.
+
+        The dict returned maps account directory names to the owner's email
+        address and must not be modified: it is kept for use by all
+        _OperaEmailClient instances until the accounts file is changed.
+
+        """
+        stat_result = os.stat(self.accountdefs)
+        cached = self._accounts_cache.get(self.accountdefs)
+        if (
+            cached is not None
+            and cached[0] == stat_result.st_mtime_ns
+            and cached[1] == stat_result.st_size
+        ):
+            return cached[2]
+        account_map = self._read_accounts()
+        self._accounts_cache[self.accountdefs] = (
+            stat_result.st_mtime_ns,
+            stat_result.st_size,
+            account_map,
+        )
+        return account_map
+
+    def _read_accounts(self):
         """Return account names associated with owner's email addresses."""
         account_map = {}
         looking_for_email = False
@@ -550,57 +1142,215 @@ class _OperaEmailClient:
         the emailsfrom argument of _OperaEmailClient() call.
 
         """
-        if self.emailsfrom is None:
-            return self.get_emails()
-        accounts = self.get_accounts()
         emails = []
         filenamemap = {}
-        for email in self.get_emails():
-            filename = self._is_from_addressee_of_email_in_selection(
-                email, accounts
-            )
-            if filename:
-                emails.append(email)
+        selected_headers = {}
+        for (
+            email,
+            filename,
+            headers,
+        ) in self._iter_emails_for_from_addressees():
+            emails.append(email)
+            if filename is not None:
                 filenamemap[email[-1]] = filename
+            if headers is not None:
+                selected_headers[email] = headers
         self._filename_map = filenamemap
+        self._selected_headers = selected_headers
         return emails
 
-    def _is_from_addressee_of_email_in_selection(self, emailfile, accounts):
-        """Return True if no selection or from addressee in selection."""
+    def _iter_emails_for_from_addressees(self):
+        """Yield (email file, filename, headers) for selected emails.
+
+        The emails are yielded in the order stored in mail store, and the
+        headers are the (sender, date, messageid, filename) tuple read from
+        the email file.
+
+        The filename and headers are None if emails are not selected by
+        'From Adressee', when the emailsfrom argument of _OperaEmailClient()
+        call is None.
+
+        The email files are read in batches so the first selected emails
+        are yielded before all the email files have been read.
+
+        """
         if self.emailsfrom is None:
-            return True
-        with open(os.path.join(*emailfile), "rb") as file_open:
-            message = message_from_binary_file(file_open, _class=_MessageFile)
-            from_ = parseaddr(message.get("From"))[-1]
+            with self.stats.timer("list"):
+                emails = self.get_emails()
+            self.stats.count("messages_matched", len(emails))
+            self.reporter.progress(
+                "select", scanned=len(emails), matched=len(emails)
+            )
+            for email in emails:
+                yield email, None, None
+            return
+        accounts = self.get_accounts()
+        matched = 0
+        if self.headerindex is not None:
+            self._header_index = HeaderIndex(self.headerindex)
+            try:
+                self._header_index.open()
+            except HeaderIndexError as exc:
+                self._header_index = None
+                raise EmailCollectorError(str(exc)) from exc
+        executor = None
+        try:
+            if self.workers > 1:
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=self.mp_context
+                )
+            with self.stats.timer("list"):
+                emailfiles = self.get_emails()
+            for start in range(0, len(emailfiles), _HEADER_BATCH_SIZE):
+                _check_cancelled(self.cancelled)
+                batch = emailfiles[start : start + _HEADER_BATCH_SIZE]
+                with self.stats.timer("headers"):
+                    batch_headers = self._get_emails_headers(batch, executor)
+                selected = []
+                with self.stats.timer("compare"):
+                    for email, headers in zip(batch, batch_headers):
+                        filename = (
+                            self._is_from_addressee_of_email_in_selection(
+                                email, accounts, headers=headers
+                            )
+                        )
+                        if filename:
+                            selected.append((email, filename, headers))
+                self.stats.count("messages_compared", len(batch))
+                self.stats.count("messages_matched", len(selected))
+                matched += len(selected)
+                self.reporter.progress(
+                    "select",
+                    scanned=start + len(batch),
+                    matched=matched,
+                )
+                yield from selected
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            if self._header_index is not None:
+                header_index = self._header_index
+                self._header_index = None
+                try:
+                    header_index.close()
+                except HeaderIndexError as exc:
+                    raise EmailCollectorError(str(exc)) from exc
 
-            # Ignore emails sent by account owner.
-            if from_ == accounts[emailfile[1]]:
-                return False
+    def _get_emails_headers(self, emailfiles, executor=None):
+        """Return list of (sender, date, messageid, filename) for emailfiles.
+
+        The header index, if any, is used when it has an entry for an email
+        file and the file has not changed since the entry was made.
+
+        The email files not in the header index are read by the worker
+        processes of executor, if not None, and the headers are returned in
+        the same order as emailfiles.
+
+        """
+        paths = [os.path.join(*e) for e in emailfiles]
+        if self._header_index is None:
+            headers = [None] * len(paths)
+            stat_results = None
+        else:
+            stat_results = [os.stat(p) for p in paths]
+            headers = [
+                self._header_index.get(p, s)
+                for p, s in zip(paths, stat_results)
+            ]
+        unknown = [i for i, h in enumerate(headers) if h is None]
+        if executor is None:
+            parsed = map(_get_opera_email_headers, [paths[i] for i in unknown])
+        else:
+            parsed = executor.map(
+                _get_opera_email_headers,
+                [paths[i] for i in unknown],
+                chunksize=max(1, len(unknown) // (self.workers * 4)),
+            )
+        missing = 0
+        for i, email_headers in zip(unknown, parsed):
+            headers[i] = email_headers
+            if email_headers[-1] is None:
+                missing += 1
+            if stat_results is not None:
+                self._header_index.put(
+                    paths[i], stat_results[i], email_headers
+                )
+        self.stats.count("messages_parsed", len(unknown))
+        self.stats.count("header_index_hits", len(paths) - len(unknown))
+        self.stats.count("filenames_generated", len(unknown) - missing)
+        self.stats.count("filenames_missing", missing)
+        return headers
+
+    def _is_from_addressee_of_email_in_selection(
+        self, emailfile, accounts, headers=None
+    ):
+        """Return True if no selection or from addressee in selection.
 
-            if not self.emailsfrom:
-                return message.generate_filename()
+        headers - (sender, date, messageid, filename) for emailfile, or None
+                  to read them from emailfile
 
-            # Ignore emails not sent by someone in self.emailsfrom.
-            # Account owners may be in that set, so emails sent from one
-            # account owner to another can get selected.
-            if from_ in self.emailsfrom:
-                return message.generate_filename()
+        """
+        if self.emailsfrom is None:
+            return True
+        # Only the From and Date headers are needed so the body, including
+        # any attachments, is not read.  The body is parsed later, by the
+        # selected_emails_text property, for the emails selected.
+        if headers is None:
+            headers = self._get_emails_headers((emailfile,))[0]
+        from_, date_, messageid, filename = headers
+        del date_, messageid
+
+        # Ignore emails sent by account owner.
+        if from_ == accounts[emailfile[1]]:
             return False
 
+        if not self.emailsfrom:
+            return filename or False
+
+        # Ignore emails not sent by someone in self.emailsfrom.
+        # Account owners may be in that set, so emails sent from one
+        # account owner to another can get selected.
+        if from_ in self.emailsfrom:
+            return filename or False
+        return False
+
     def copy_emails_to_directory(self):
-        """Copy selected email files to directory and return count."""
+        """Copy selected email files to directory and return count or None.
+
+        None is returned if no emails are copied, or a copy fails, and the
+        checkpoint is then not written.
+
+        """
+        directory = self.outputdirectory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        manifest = Manifest(directory)
+        try:
+            with self.stats.timer("copy"):
+                count = self._copy_emails_to_directory(manifest)
+        finally:
+            manifest.save()
+        if count is not None:
+            self.write_checkpoint()
+        return count
+
+    def _copy_emails_to_directory(self, manifest):
+        """Copy selected email files to directory and return count or None.
+
+        manifest - the Manifest of emails already in directory
+
+        """
         copied = set()
         changed = set()
         equal = set()
         exist_and_exclude = set()
         directory = self.outputdirectory
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        exist = set(os.listdir(directory))
+        exist = _list_collected(directory)
         emailfiles = set(self.selected_emails)
         filenamemap = self._filename_map
         exclude = set() if self.exclude is None else self.exclude
         while emailfiles:
+            _check_cancelled(self.cancelled)
             emailpath = emailfiles.pop()
             filename = filenamemap[emailpath[-1]]
             if filename in exclude:
@@ -610,12 +1360,9 @@ class _OperaEmailClient:
             if filename not in exist:
                 copied.add(emailpath)
                 continue
-            if not filecmp.cmp(
-                os.path.join(*emailpath),
-                os.path.join(directory, filename),
-                shallow=False,
-            ):
-                changed.add(os.path.join(*emailpath))
+            source = os.path.join(*emailpath)
+            if not manifest.is_same(filename, source, os.stat(source)):
+                changed.add(source)
                 continue
             equal.add(emailpath)
 
@@ -624,8 +1371,7 @@ class _OperaEmailClient:
             # Change to any files copied previously is sufficient reason to not
             # do any copying at all.
             if changed:
-                tkinter.messagebox.showinfo(
-                    parent=self.parent,
+                self.reporter.information(
                     title="Copy Emails to Output Directory",
                     message="".join(
                         (
@@ -638,8 +1384,7 @@ class _OperaEmailClient:
 
             # Existence of any file to be excluded is also sufficient reason.
             if exist_and_exclude:
-                tkinter.messagebox.showinfo(
-                    parent=self.parent,
+                self.reporter.information(
                     title="Copy Emails to Output Directory",
                     message="".join(
                         (
@@ -663,8 +1408,7 @@ class _OperaEmailClient:
                 chigh = sorted_filenames[-1]
                 if clow < efhigh:
                     if chigh > eflow:
-                        tkinter.messagebox.showinfo(
-                            parent=self.parent,
+                        self.reporter.information(
                             title="Copy Emails to Output Directory",
                             message="".join(
                                 (
@@ -680,30 +1424,41 @@ class _OperaEmailClient:
                         )
                         return None
 
+        count = 0
+        size = 0
         for emailpath in copied:
-            with open(os.path.join(*emailpath), "rb") as input_open:
-                try:
-                    with open(
-                        os.path.join(directory, filenamemap[emailpath[-1]]),
-                        "wb",
-                    ) as file_open:
-                        file_open.write(input_open.read())
-                except FileNotFoundError as exc:
-                    tkinter.messagebox.showinfo(
-                        parent=self.parent,
-                        title="Update Extracted Text",
-                        message="".join(
-                            (
-                                "Write additional file to directory\n\n",
-                                os.path.basename(
-                                    os.path.dirname(exc.filename)
-                                ),
-                                "\n\nfailed.\n\nHopefully because the ",
-                                "directory does not exist yet: it could ",
-                                "have been deleted.",
-                            )
-                        ),
-                    )
+            _check_cancelled(self.cancelled)
+            source = os.path.join(*emailpath)
+            filename = filenamemap[emailpath[-1]]
+            try:
+                _copy_file_atomic(source, os.path.join(directory, filename))
+                stat_result = os.stat(source)
+                manifest.record(
+                    filename, source, stat_result, file_digest(source)
+                )
+                count += 1
+                size += stat_result.st_size
+                self.stats.count("files_copied")
+                self.stats.count("bytes_written", stat_result.st_size)
+                self.reporter.progress("copy", copied=count, bytes=size)
+            except FileNotFoundError as exc:
+                if exc.filename == source:
+                    raise
+                self.reporter.information(
+                    title="Update Extracted Text",
+                    message="".join(
+                        (
+                            "Write additional file to directory\n\n",
+                            os.path.basename(os.path.dirname(exc.filename)),
+                            "\n\nfailed.\n\nHopefully because the ",
+                            "directory does not exist yet: it could ",
+                            "have been deleted.",
+                        )
+                    ),
+                )
+
+                # The checkpoint must not be moved past emails not copied.
+                return None
         return len(copied)
 
     @property
@@ -715,24 +1470,100 @@ class _OperaEmailClient:
 
     @property
     def selected_emails_text(self):
-        """Return text extracted from selected emails."""
+        """Return LazyMessage for each selected email.
+
+        The emails are read when used and a limited number are kept.
+
+        """
         if self._selected_emails_text:
             return self._selected_emails_text
-        emails_text = []
-        for email_filepath in self._selected_emails:
-            with open(os.path.join(*email_filepath), "rb") as file_open:
-                emails_text.append(
-                    message_from_binary_file(file_open, _class=_MessageFile)
-                )
-        self._selected_emails_text = emails_text
+        selected_headers = self._selected_headers
+        self._selected_emails_text = [
+            self._get_lazy_message(e, selected_headers.get(e))
+            for e in self._selected_emails
+        ]
         return self._selected_emails_text
 
+    def _get_message(self, emailfile):
+        """Return message read from emailfile."""
+        with open(os.path.join(*emailfile), "rb") as file_open:
+            message = message_from_binary_file(file_open, _class=_MessageFile)
+            self.stats.count("messages_read")
+            self.stats.count("bytes_read", file_open.tell())
+            return message
+
+    def _get_lazy_message(self, emailfile, headers):
+        """Return LazyMessage for emailfile.
+
+        headers - (sender, date, messageid, filename) tuple for emailfile
+                  or None
+
+        """
+        if headers is None:
+            known = None
+        else:
+            known = {"date": headers[1], "message-id": headers[2]}
+        return LazyMessage(
+            emailfile,
+            functools.partial(self._get_message, emailfile),
+            self._message_cache,
+            headers=known,
+        )
+
+    def iter_selected(self, keep=False):
+        """Yield (filename, source, message) for each selected email.
+
+        filename - the name of the email's file in the output directory
+        source - the path of the email file in the mail store
+        message - a LazyMessage which reads the email file when used
+        keep - if True the selection is kept once all selected emails have
+               been yielded
+
+        The selected emails are yielded as they are found unless the
+        selection has been done already.
+
+        """
+        if self._selected_emails is not None:
+            filenamemap = self.filename_map
+            selected_headers = self._selected_headers
+            emails = (
+                (e, filenamemap.get(e[-1]), selected_headers.get(e))
+                for e in self._selected_emails
+            )
+            keep = False
+        else:
+            emails = self._iter_emails_for_from_addressees()
+        selected = []
+        filenamemap = {}
+        selected_headers = {}
+        for email, filename, headers in emails:
+            if keep:
+                selected.append(email)
+                if filename is not None:
+                    filenamemap[email[-1]] = filename
+                if headers is not None:
+                    selected_headers[email] = headers
+            yield (
+                filename,
+                os.path.join(*email),
+                self._get_lazy_message(email, headers),
+            )
+        if keep:
+            self._filename_map = filenamemap
+            self._selected_headers = selected_headers
+            self._selected_emails = selected
+
     @property
     def excluded_emails(self):
-        """Return set of excluded emails."""
+        """Return set of excluded emails.
+
+        The set is not a copy and must not be changed by the caller: use
+        the exclude_email and include_email methods of EmailCollector.
+
+        """
         if not self.exclude:
-            return set()
-        return set(self.exclude)
+            return frozenset()
+        return self.exclude
 
     @property
     def filename_map(self):
@@ -741,6 +1572,10 @@ class _OperaEmailClient:
             return {}
         return self._filename_map
 
+    def message_filename(self, message):
+        """Return filename of LazyMessage message or None."""
+        return self.filename_map.get(message.key[-1])
+
 
 class _MboxEmail:
     """Extract emails matching selection criteria from a mbox format file.
@@ -767,6 +1602,14 @@ class _MboxEmail:
         collected=None,
         exclude=None,
         mailboxstyle=_MBOX_FORMAT,
+        headerindex=None,
+        mboxscanner=None,
+        workers=None,
+        checkpoint=None,
+        reporter=None,
+        cancelled=None,
+        stats=None,
+        mp_context=None,
     ):
         """Define the email extraction rules from configuration.
 
@@ -779,19 +1622,48 @@ class _MboxEmail:
         collected - directory to which email files are copied
         exclude - iterable of email filenames to be ignored when copying
         mailboxstyle - must be 'mailbox' ignoring case
+        headerindex - file holding a date index of the mbox files between runs
+        mboxscanner - 'mmap' (default) or 'readline' to read the mbox files
+        workers - number of processes scanning mbox files, default 1
+        checkpoint - ignored
+        reporter - Reporter instance told about problems and progress
+        cancelled - threading.Event set to cancel selection or copy
+        stats - CollectorStats instance recording counts and timings
+        mp_context - multiprocessing context for worker processes or None
 
         See AppSysDate for accepted date formats.  Preferred are '30 Nov 2006'
         and '2006-11-30'.
 
         """
-        del accountdefs, accounts
+        del accountdefs, accounts, checkpoint
         self.parent = parent
+        if reporter is None:
+            reporter = LoggingReporter()
+        self.reporter = reporter
+        if cancelled is None:
+            cancelled = threading.Event()
+        self.cancelled = cancelled
+        if stats is None:
+            stats = NullStats()
+        self.stats = stats
+        self.mp_context = mp_context
         if mailboxstyle.lower() != _MBOX_FORMAT:
             raise EmailCollectorError("Mailbox style expected to be mbox")
         if mailstore is None:
             raise EmailCollectorError(
                 "The mbox file set is not specified in mailstore argument"
             )
+        if mboxscanner is None:
+            mboxscanner = _MBOX_SCANNER_MMAP
+        if mboxscanner.lower() not in (
+            _MBOX_SCANNER_MMAP,
+            _MBOX_SCANNER_READLINE,
+        ):
+            raise EmailCollectorError(
+                "Mbox scanner expected to be mmap or readline"
+            )
+        self.mboxscanner = mboxscanner.lower()
+        self.workers = _get_workers(workers)
         self.mailstore = set()
         for email in mailstore:
             if isinstance(email, (str, bytes)):
@@ -819,8 +1691,7 @@ class _MboxEmail:
             self.mostrecentdate = appsysdate.iso_format_date()
         self.emailsfrom = emailsfrom
         if collected is None:
-            tkinter.messagebox.showinfo(
-                parent=self.parent,
+            self.reporter.information(
                 title="Collect Emails",
                 message="".join(
                     (
@@ -834,20 +1705,238 @@ class _MboxEmail:
             collected = COLLECTED
         self.outputdirectory = os.path.join(directory, collected)
         self.exclude = exclude
+        if headerindex is not None:
+            headerindex = os.path.join(
+                directory, os.path.expanduser(os.path.expandvars(headerindex))
+            )
+        self.headerindex = headerindex
+        self._header_index = None
+        self._mbox_maps = {}
+        self._mbox_stats = {}
+        self._message_cache = MessageCache()
         self._selected_emails = None
         self._selected_emails_text = None
         self._filename_map = None
 
+    def _scan_mbox(self, mailstore, ranges=None):
+        """Return list of MboxEntry instances for messages in mailstore.
+
+        ranges - list of (begin, end) byte ranges to scan, or None to scan
+                 the whole file
+
+        FileNotFoundError is raised if mailstore does not exist.
+
+        """
+        if ranges is None:
+            ranges = [(0, None)]
+        entries = []
+        for begin, end in ranges:
+            if self.mboxscanner == _MBOX_SCANNER_READLINE:
+                entries.extend(
+                    scan_mbox(mailstore, _get_mbox_email_headers, begin, end)
+                )
+            else:
+                entries.extend(
+                    scan_mbox_mmap(
+                        self._get_mbox_map(mailstore),
+                        _get_mbox_email_headers,
+                        begin,
+                        end,
+                    )
+                )
+        return entries
+
+    def _scan_mbox_files(self, earliest_date=None, latest_date=None):
+        """Yield list of MboxEntry instances for each file in mailstore.
+
+        earliest_date, latest_date - 'yyyymmdd' range of dates of messages
+                                     wanted, either can be None for no limit
+
+        Just the blocks of a file which may contain messages in the date
+        range are scanned if the header index has a date index for the
+        file, otherwise the whole file is scanned and it's date index is
+        put in the header index.  Messages outside the date range may be
+        in the lists.
+
+        The files are scanned by worker processes, one file per process, if
+        more than one worker is allowed.  The lists are yielded in the same
+        order whether or not worker processes are used.
+
+        FileNotFoundError is raised if a file does not exist.
+
+        """
+        mailstores = list(self.mailstore)
+        ranges = [
+            self._get_mbox_ranges(mailstore, earliest_date, latest_date)
+            for mailstore in mailstores
+        ]
+        if self.workers == 1 or len(mailstores) == 1:
+            for mailstore, mailstore_ranges in zip(mailstores, ranges):
+                _check_cancelled(self.cancelled)
+                with self.stats.timer("headers"):
+                    entries = self._scan_mbox(mailstore, mailstore_ranges)
+                self._index_scanned(mailstore, entries, mailstore_ranges)
+                yield entries
+            return
+        executor = ProcessPoolExecutor(
+            max_workers=min(self.workers, len(mailstores)),
+            mp_context=self.mp_context,
+        )
+        try:
+            futures = [
+                executor.submit(
+                    _scan_mbox_file,
+                    mailstore,
+                    self.mboxscanner,
+                    mailstore_ranges,
+                )
+                for mailstore, mailstore_ranges in zip(mailstores, ranges)
+            ]
+            for mailstore, mailstore_ranges, future in zip(
+                mailstores, ranges, futures
+            ):
+                _check_cancelled(self.cancelled)
+                with self.stats.timer("headers"):
+                    entries = future.result()
+                self._index_scanned(mailstore, entries, mailstore_ranges)
+                yield entries
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _get_mbox_ranges(self, mailstore, earliest_date, latest_date):
+        """Return list of (begin, end) byte ranges of mailstore to scan.
+
+        None is returned, meaning scan the whole file, if there is no header
+        index, no date range, or no date index for mailstore in the header
+        index.
+
+        FileNotFoundError is raised if mailstore does not exist.
+
+        """
+        if self._header_index is None:
+            return None
+        if earliest_date is None and latest_date is None:
+            return None
+        blocks = self._header_index.get_blocks(
+            mailstore, self._get_mbox_stat(mailstore)
+        )
+        if blocks is None:
+            return None
+        return block_ranges(blocks, earliest_date, latest_date)
+
+    def _index_scanned(self, mailstore, entries, ranges):
+        """Count the messages found in mailstore and index it's dates.
+
+        The date index of mailstore is put in the header index, if any, when
+        the whole file was scanned, indicated by ranges being None.
+
+        """
+        self._count_scanned(mailstore, entries, ranges)
+        if ranges is not None or self._header_index is None:
+            return
+        stat_result = self._get_mbox_stat(mailstore)
+        self._header_index.put_blocks(
+            mailstore,
+            stat_result,
+            date_blocks(entries, stat_result.st_size),
+        )
+
+    def _count_scanned(self, mailstore, entries, ranges=None):
+        """Count the messages, MboxEntry instances, found in mailstore."""
+        stats = self.stats
+        missing = sum(1 for entry in entries if not entry.filename)
+        size = self._get_mbox_stat(mailstore).st_size
+        if ranges is None:
+            stats.count("bytes_scanned", size)
+        else:
+            scanned = sum(end - begin for begin, end in ranges)
+            stats.count("bytes_scanned", scanned)
+            stats.count("bytes_skipped", size - scanned)
+        stats.count("messages_parsed", len(entries))
+        stats.count("filenames_generated", len(entries) - missing)
+        stats.count("filenames_missing", missing)
+
+    def _get_mbox_map(self, mailstore):
+        """Return MboxMap for mailstore, creating it if necessary."""
+        mboxmap = self._mbox_maps.get(mailstore)
+        if mboxmap is None:
+            mboxmap = MboxMap(mailstore)
+            self._mbox_maps[mailstore] = mboxmap
+        return mboxmap
+
+    def release_maps(self):
+        """Close the MboxMap of each mbox file mapped so far."""
+        mbox_maps = self._mbox_maps
+        self._mbox_maps = {}
+        for mboxmap in mbox_maps.values():
+            try:
+                mboxmap.close()
+            except BufferError:
+
+                # A message still refers to the map, which is unmapped when
+                # the message is discarded.
+                pass
+
+    def _get_mbox_stat(self, mailstore):
+        """Return os.stat() result for mailstore noted at first call."""
+        stat_result = self._mbox_stats.get(mailstore)
+        if stat_result is None:
+            stat_result = os.stat(mailstore)
+            self._mbox_stats[mailstore] = stat_result
+        return stat_result
+
+    def _get_message_bytes(self, entry):
+        """Return bytes to be written to collected file for message at entry.
+
+        The bytes are the message as stored in the mbox file, without the
+        "From " line, so the message is not parsed and flattened.  The bytes
+        are a memoryview slice of the mbox file's memory map if the mbox
+        files are memory mapped.
+
+        """
+        if self.mboxscanner == _MBOX_SCANNER_READLINE:
+            return entry.read()[-1]
+        return entry.read(mboxmap=self._get_mbox_map(entry.mailstore))[-1]
+
+    def _flatten(self, entry):
+        """Return message at entry flattened by a BytesGenerator.
+
+        This was how messages were written to collected files before the
+        bytes in the mbox file were used directly.
+
+        """
+        bytes_io = BytesIO()
+        generator = BytesGenerator(
+            bytes_io, mangle_from_=False, maxheaderlen=0
+        )
+        generator.flatten(self._get_message(entry))
+        return bytes_io.getvalue()
+
+    def _get_message(self, entry):
+        """Return message at entry read from it's mbox file."""
+        self.stats.count("messages_read")
+        self.stats.count("bytes_read", entry.stop - entry.start)
+        if self.mboxscanner == _MBOX_SCANNER_READLINE:
+            return entry.get_message(_MboxMessageFile)
+        return entry.get_message(
+            _MboxMessageFile, mboxmap=self._get_mbox_map(entry.mailstore)
+        )
+
     def get_emails(self):
-        """Return messages in order stored in mail store."""
+        """Return (filename, MboxEntry) tuples in filename order.
+
+        The MboxEntry instances locate the messages in the mbox files, and
+        hold the headers used to select messages, so the messages are read
+        again only when copied or displayed.
+
+        """
         if self.earliestdate is not None:
             try:
                 earliest_date = self.earliestdate.split("-")
                 date(*([int(d) for d in earliest_date]))
                 earliest_date = "".join(earliest_date)
             except Exception:
-                tkinter.messagebox.showinfo(
-                    parent=self.parent,
+                self.reporter.information(
                     title="Select Emails",
                     message="".join(
                         (
@@ -866,8 +1955,7 @@ class _MboxEmail:
                 date(*([int(d) for d in mrd]))
                 mrd = "".join(mrd)
             except Exception:
-                tkinter.messagebox.showinfo(
-                    parent=self.parent,
+                self.reporter.information(
                     title="Select Emails",
                     message="".join(
                         (
@@ -887,45 +1975,56 @@ class _MboxEmail:
         # A (send date, sender) is assumed to refer to one email which may
         # be present in more than one mbox-style file.
 
+        # The mbox-style files may be scanned by worker processes and the
+        # lists of messages found are merged here.
+
         emails = {}
         timefrom = {}
+        scanned = 0
+        if self.headerindex is not None:
+            self._header_index = HeaderIndex(self.headerindex)
+            try:
+                self._header_index.open()
+            except HeaderIndexError as exc:
+                self._header_index = None
+                raise EmailCollectorError(str(exc)) from exc
         try:
-            for mailstore in self.mailstore:
-                try:
-                    mailstore_mbox = mbox(
-                        mailstore, factory=_MboxMessageFile, create=False
-                    )
-                except NoSuchMailboxError as exc:
-                    tkinter.messagebox.showinfo(
-                        parent=self.parent,
-                        title="Mailbox Not Found",
-                        message="".join(
-                            (
-                                "File\n\n",
-                                os.path.basename(str(exc)),
-                                "\n\ndoes not exist.\n\nAny emails found ",
-                                "in other files have been ignored.",
-                            )
-                        ),
-                    )
-                    return []
-                for message in mailstore_mbox.itervalues():
-                    filename = message.generate_filename()
-                    fnd = filename[:8]
-                    if earliest_date is not None:
-                        if fnd < earliest_date:
-                            continue
-                    if mrd is not None:
-                        if fnd > mrd:
+            try:
+                for entries in self._scan_mbox_files(earliest_date, mrd):
+                    scanned += len(entries)
+                    self.reporter.progress("select", scanned=scanned)
+                    for entry in entries:
+                        filename = entry.filename
+                        if not filename:
                             continue
-                    msgid = message.get("Message-ID")
-                    if filename not in timefrom:
-                        timefrom[filename] = set()
-                    timefrom[filename].add(msgid)
-
-                    # Assume it is impossible two different emails have same
-                    # timestamp, from addressee, and message-id.
-                    emails[(filename, msgid)] = message
+                        fnd = filename[:8]
+                        if earliest_date is not None:
+                            if fnd < earliest_date:
+                                continue
+                        if mrd is not None:
+                            if fnd > mrd:
+                                continue
+                        msgid = entry.messageid
+                        if filename not in timefrom:
+                            timefrom[filename] = set()
+                        timefrom[filename].add(msgid)
+
+                        # Assume it is impossible two different emails have
+                        # same timestamp, from addressee, and message-id.
+                        emails[(filename, msgid)] = entry
+            except FileNotFoundError as exc:
+                self.reporter.information(
+                    title="Mailbox Not Found",
+                    message="".join(
+                        (
+                            "File\n\n",
+                            os.path.basename(str(exc.filename)),
+                            "\n\ndoes not exist.\n\nAny emails found ",
+                            "in other files have been ignored.",
+                        )
+                    ),
+                )
+                return []
 
         except EmailCollectorError:
             raise
@@ -942,6 +2041,14 @@ class _MboxEmail:
             raise EmailCollectorError(
                 "Exception before any emails collected."
             ) from None
+        finally:
+            if self._header_index is not None:
+                header_index = self._header_index
+                self._header_index = None
+                try:
+                    header_index.close()
+                except HeaderIndexError as exc:
+                    raise EmailCollectorError(str(exc)) from exc
         for k, value in timefrom.items():
             if len(value) == 1:
                 emails[k] = emails.pop((k, value.pop()))
@@ -958,12 +2065,22 @@ class _MboxEmail:
 
         """
         if self.emailsfrom is None:
-            return self.get_emails()
+            emails = self.get_emails()
+            self.stats.count("messages_matched", len(emails))
+            self.reporter.progress("select", matched=len(emails))
+            return emails
         emails = []
-        for email in self.get_emails():
-            fntrue = self._is_from_addressee_of_email_in_selection(email[-1])
-            if fntrue:
-                emails.append(email)
+        candidates = self.get_emails()
+        with self.stats.timer("compare"):
+            for email in candidates:
+                fntrue = self._is_from_addressee_of_email_in_selection(
+                    email[-1]
+                )
+                if fntrue:
+                    emails.append(email)
+        self.stats.count("messages_compared", len(candidates))
+        self.stats.count("messages_matched", len(emails))
+        self.reporter.progress("select", matched=len(emails))
         return emails
 
     def _is_from_addressee_of_email_in_selection(self, emailfile):
@@ -972,7 +2089,7 @@ class _MboxEmail:
             return True
 
         # By analogy with _OperaEmailClient version of this method
-        from_ = parseaddr(emailfile.get("From"))[-1]
+        from_ = emailfile.sender
         if not self.emailsfrom:
             return True
 
@@ -981,46 +2098,60 @@ class _MboxEmail:
 
     def copy_emails_to_directory(self):
         """Copy selected email files to directory and return count."""
+        directory = self.outputdirectory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        manifest = Manifest(directory)
+        try:
+            with self.stats.timer("copy"):
+                return self._copy_emails_to_directory(manifest)
+        finally:
+            manifest.save()
+            self.release_maps()
+
+    def _copy_emails_to_directory(self, manifest):
+        """Copy selected email files to directory and return count.
+
+        manifest - the Manifest of emails already in directory
+
+        """
         copied = set()
         changed = set()
         equal = set()
         exist_and_exclude = set()
         directory = self.outputdirectory
-        if not os.path.exists(directory):
-            os.makedirs(directory)
-        exist = set(os.listdir(directory))
+        exist = _list_collected(directory)
         emailfiles = set(self.selected_emails)
         exclude = set() if self.exclude is None else self.exclude
         while emailfiles:
-            filename, message = emailfiles.pop()
+            _check_cancelled(self.cancelled)
+            filename, entry = emailfiles.pop()
             if filename in exclude:
                 if filename in exist:
-                    exist_and_exclude.add(message)
+                    exist_and_exclude.add(entry)
                 continue
             if filename not in exist:
-                copied.add((filename, message))
+                copied.add((filename, entry))
                 continue
 
-            # message is in memory as mboxMessage so read (directory, filename)
-            bytes_io = BytesIO()
-            generator = BytesGenerator(
-                bytes_io, mangle_from_=False, maxheaderlen=0
-            )
-            generator.flatten(message)
-            text = bytes_io.getvalue()
-            with open(os.path.join(directory, filename), "rb") as infile:
-                if bytes_io.getvalue() != infile.read():
-                    changed.add(filename)
-                    continue
-            equal.add(message)
+            # Compare message read from mbox with (directory, filename)
+            if not manifest.is_same(
+                filename,
+                _mbox_source(entry),
+                self._get_mbox_stat(entry.mailstore),
+                source_data=functools.partial(self._get_message_bytes, entry),
+                fallback_data=functools.partial(self._flatten, entry),
+            ):
+                changed.add(filename)
+                continue
+            equal.add(entry)
 
         if exist:
 
             # Change to any files copied previously is sufficient reason to not
             # do any copying at all.
             if changed:
-                tkinter.messagebox.showinfo(
-                    parent=self.parent,
+                self.reporter.information(
                     title="Copy Emails to Output Directory",
                     message="".join(
                         (
@@ -1033,8 +2164,7 @@ class _MboxEmail:
 
             # Existence of any file to be excluded is also sufficient reason.
             if exist_and_exclude:
-                tkinter.messagebox.showinfo(
-                    parent=self.parent,
+                self.reporter.information(
                     title="Copy Emails to Output Directory",
                     message="".join(
                         (
@@ -1058,8 +2188,7 @@ class _MboxEmail:
                 chigh = sorted_filenames[-1]
                 if clow < efhigh:
                     if chigh > eflow:
-                        tkinter.messagebox.showinfo(
-                            parent=self.parent,
+                        self.reporter.information(
                             title="Copy Emails to Output Directory",
                             message="".join(
                                 (
@@ -1075,21 +2204,26 @@ class _MboxEmail:
                         )
                         return None
 
-        for filename, message in copied:
-            bytes_io = BytesIO()
-            generator = BytesGenerator(
-                bytes_io, mangle_from_=False, maxheaderlen=0
-            )
-            generator.flatten(message)
-            text = bytes_io.getvalue()
+        count = 0
+        size = 0
+        for filename, entry in copied:
+            _check_cancelled(self.cancelled)
+            text = self._get_message_bytes(entry)
             try:
-                with open(
-                    os.path.join(directory, filename), "wb"
-                ) as file_open:
-                    file_open.write(text)
+                _write_file_atomic(text, os.path.join(directory, filename))
+                manifest.record(
+                    filename,
+                    _mbox_source(entry),
+                    self._get_mbox_stat(entry.mailstore),
+                    bytes_digest(text),
+                )
+                count += 1
+                size += len(text)
+                self.stats.count("files_copied")
+                self.stats.count("bytes_written", len(text))
+                self.reporter.progress("copy", copied=count, bytes=size)
             except FileNotFoundError as exc:
-                tkinter.messagebox.showinfo(
-                    parent=self.parent,
+                self.reporter.information(
                     title="Copy Emails to Output Directory",
                     message="".join(
                         (
@@ -1112,25 +2246,84 @@ class _MboxEmail:
 
     @property
     def selected_emails_text(self):
-        """Return text extracted from selected emails."""
+        """Return LazyMessage for each selected email.
+
+        The emails are read when used and a limited number are kept.
+
+        """
         if self._selected_emails_text:
             return self._selected_emails_text
-        emails_text = []
-        for _, message in self._selected_emails:
-            emails_text.append(message)
-        self._selected_emails_text = emails_text
+        self._selected_emails_text = [
+            self._get_lazy_message(entry) for _, entry in self._selected_emails
+        ]
         return self._selected_emails_text
 
+    def _get_lazy_message(self, entry):
+        """Return LazyMessage for message at MboxEntry entry."""
+        return LazyMessage(
+            (entry.mailstore, entry.start),
+            functools.partial(self._get_message, entry),
+            self._message_cache,
+            headers={"date": entry.date, "message-id": entry.messageid},
+        )
+
+    def iter_selected(self, keep=False):
+        """Yield (filename, source, message) for each selected email.
+
+        filename - the name of the email's file in the output directory
+        source - the mbox file and byte range of the email, see _mbox_source
+        message - a LazyMessage which reads the email from the mbox file
+                  when used
+        keep - if True the selection is kept
+
+        All the mbox files are scanned before the first email is yielded
+        because the filenames of emails with the same timestamp and sender
+        depend on all the emails found.  The messages are not kept.
+
+        """
+        if self._selected_emails is not None:
+            emails = self._selected_emails
+        else:
+            emails = self._get_emails_for_from_addressees()
+            if keep:
+                self._selected_emails = emails
+        for filename, entry in emails:
+            yield (
+                filename,
+                _mbox_source(entry),
+                self._get_lazy_message(entry),
+            )
+
     @property
     def excluded_emails(self):
-        """Return set of excluded emails."""
+        """Return set of excluded emails.
+
+        The set is not a copy and must not be changed by the caller: use
+        the exclude_email and include_email methods of EmailCollector.
+
+        """
         if not self.exclude:
-            return set()
-        return set(self.exclude)
+            return frozenset()
+        return self.exclude
 
     @property
     def filename_map(self):
-        """Return mapping email identity to filename."""
+        """Return mapping email identity to filename.
+
+        The identity of an email is the key of it's LazyMessage, the mbox
+        file and start of email in file.  The mapping is empty until the
+        selection has been kept.
+
+        """
         if not self._filename_map:
-            return {}
+            if not self._selected_emails:
+                return {}
+            self._filename_map = {
+                (entry.mailstore, entry.start): filename
+                for filename, entry in self._selected_emails
+            }
         return self._filename_map
+
+    def message_filename(self, message):
+        """Return filename of LazyMessage message or None."""
+        return self.filename_map.get(message.key)
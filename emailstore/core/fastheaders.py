@@ -0,0 +1,207 @@
+# fastheaders.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Extract the headers used to select emails without the email package.
+
+selection_headers() finds the From, Date, and Message-ID headers in the raw
+bytes of an email's header block, and generates the name of the email's
+file in the collected directory, much faster than parsing the headers into
+an email.message.EmailMessage and using parseaddr, parsedate_tz, and
+strftime.
+
+The header values are the strings the email package gives for its default,
+compat32, policy: folded lines are kept as found and RFC 2047 encoded words
+are not decoded.  An encoded display name does not affect the address in
+the From header, which is all that is used.
+
+The answers must be exactly those given by the email package, so None is
+returned whenever the header block, the address, or the date, is not in a
+common form known to give the same answer.  The caller then uses the email
+package.
+
+"""
+
+import re
+
+# A line of the header block which is a header field, an unix-from line, or
+# a continuation line, as recognised by email.feedparser.
+_HEADER_LINE = re.compile(rb"From |[\041-\071\073-\176]*:|[\t ]")
+
+# The lines which end a header block.
+_BLANK_LINES = frozenset((b"\r\n", b"\n", b"\r"))
+
+# The headers used to select emails, in lower case.
+_FROM = b"from"
+_DATE = b"date"
+_MESSAGE_ID = b"message-id"
+_WANTED = frozenset((_FROM, _DATE, _MESSAGE_ID))
+
+# The characters allowed in an atom, RFC 5322 atext, as a regular expression
+# character set without the brackets.
+_ATEXT = r"-A-Za-z0-9!#$%&'*+/=?^_`{|}~"
+
+# An address in a From header, with an optional display name, which
+# email.utils.parseaddr is known to return unchanged.  Each character of a
+# display name can be matched only one way so a failed match is quick.
+_ADDRESS = re.compile(
+    "".join(
+        (
+            r"\A",
+            r"(?:",
+            r"(?:[" + _ATEXT + r'. \t\r\n]|"[^"\\\r\n]*")*',
+            r"<(",
+            r"[" + _ATEXT + r"]+(?:\.[" + _ATEXT + r"]+)*",
+            r"@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*",
+            r")>",
+            r"|",
+            r"[ \t\r\n]*(",
+            r"[" + _ATEXT + r"]+(?:\.[" + _ATEXT + r"]+)*",
+            r"@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*",
+            r")",
+            r")",
+            r"[ \t\r\n]*\Z",
+        )
+    )
+)
+
+# A date in the common RFC 5322 form, with an optional trailing comment,
+# which email.utils.parsedate_tz is known to read as written.
+_DATE_TIME = re.compile(
+    "".join(
+        (
+            r"\A\s*",
+            r"(?:(?:mon|tue|wed|thu|fri|sat|sun),\s*)?",
+            r"(\d{1,2})\s+",
+            r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)\s+",
+            r"([1-9]\d{3})\s+",
+            r"(\d{1,2}):(\d{2})(?::(\d{2}))?\s+",
+            r"([+-])(\d{2})(\d{2})",
+            r"(?:\s+\([^()]*\))?",
+            r"\s*\Z",
+        )
+    ),
+    flags=re.IGNORECASE,
+)
+
+_MONTHS = {
+    name: number
+    for number, name in enumerate(
+        (
+            "jan",
+            "feb",
+            "mar",
+            "apr",
+            "may",
+            "jun",
+            "jul",
+            "aug",
+            "sep",
+            "oct",
+            "nov",
+            "dec",
+        ),
+        start=1,
+    )
+}
+
+
+def selection_headers(header_bytes):
+    """Return (sender, date, messageid, filename) or None for header_bytes.
+
+    header_bytes - the header block of an email, with or without an unix-from
+                   line and the blank line ending the block: any bytes after
+                   the header block are ignored
+
+    The values are those the email package would give for the From, Date,
+    and Message-ID headers, and the filename is like
+    '20140602101112a@b.c+0100.mbs', or None if the filename cannot be
+    generated from the From and Date headers.
+
+    None is returned if the answer might differ from the email package's
+    answer.
+
+    """
+    if not header_bytes.isascii():
+        return None
+    headers = _header_values(header_bytes)
+    from_ = headers.get(_FROM)
+    date_ = headers.get(_DATE)
+    if from_ is None or date_ is None:
+        return None
+    address = _ADDRESS.match(from_)
+    if address is None:
+        return None
+    sender = address.group(1) or address.group(2)
+    filename = _filename(sender, date_)
+    if filename is None:
+        return None
+    return (sender, date_, headers.get(_MESSAGE_ID), filename)
+
+
+def _header_values(header_bytes):
+    """Return dict of wanted header name to value found in header_bytes.
+
+    The lines are handled as email.feedparser does, and the first of any
+    repeated header is used as email.message.Message.get() does.
+
+    """
+    values = {}
+    current = None
+    lines = header_bytes.splitlines(keepends=True)
+    last = len(lines) - 1
+    for lineno, line in enumerate(lines):
+        if line in _BLANK_LINES or not _HEADER_LINE.match(line):
+            break
+        if line[0] in b" \t":
+            if current is not None:
+                current.append(line)
+            continue
+        current = None
+        if line.startswith(b"From "):
+            if lineno == last:
+                break
+            continue
+        name, value = line.split(b":", 1)
+        if not name:
+            continue
+        name = name.lower()
+        if name in _WANTED and name not in values:
+            current = [value.lstrip(b" \t")]
+            values[name] = current
+    return {
+        name: b"".join(value).rstrip(b"\r\n").decode("ascii")
+        for name, value in values.items()
+    }
+
+
+def _filename(sender, date_):
+    """Return filename for email from sender at date_, or None if unsure."""
+    match = _DATE_TIME.match(date_)
+    if match is None:
+        return None
+    day, month, year, hour, minute, second, sign, tzh, tzm = match.groups()
+    day = int(day)
+    hour = int(hour)
+    minute = int(minute)
+    second = 0 if second is None else int(second)
+    if not (1 <= day <= 31 and hour <= 23 and minute <= 59 and second <= 59):
+        return None
+    offset = int(tzh) * 3600 + int(tzm) * 60
+    if sign == "-":
+        if not offset:
+            return None
+        offset = -offset
+    return "".join(
+        (
+            year,
+            format(_MONTHS[month.lower()], "02"),
+            format(day, "02"),
+            format(hour, "02"),
+            format(minute, "02"),
+            format(second, "02"),
+            sender,
+            format(offset // 3600, "0=+3"),
+            "00.mbs",
+        )
+    )
@@ -0,0 +1,303 @@
+# headerindex.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Persistent index of the headers used to select emails from a mail store.
+
+The index is a SQLite database, usually next to the configuration file,
+with one row per email file recording the file's modification time and
+size together with the From address, Date, Message-ID, and the filename
+used when the email is copied.
+
+An entry is used only while the modification time and size of the email
+file are unchanged, so a repeated selection needs to stat each email file
+but parses just the files which are new or changed since the previous run.
+
+The index also holds a sparse date index of each mbox file: the byte range
+and the range of dates of each block of messages, from mboxindex.date_blocks,
+so a selection between two dates scans just the blocks which may contain
+selected messages.  The blocks of a mbox file are used only while the
+modification time and size of the mbox file are unchanged.
+
+The names of the email files in each day directory of an Opera mail store
+are held too, and used while the directory's modification time is unchanged,
+so the day directories of earlier days are not listed again.
+
+"""
+
+import time
+import sqlite3
+
+# Directory listings are not put in the index if the directory was modified
+# within this many nanoseconds, the coarsest modification time resolution of
+# common file systems.
+MTIME_GRANULARITY = 2 * 10**9
+
+
+class HeaderIndexError(Exception):
+    """Exception class for headerindex module."""
+
+
+class HeaderIndex:
+    """Map email file paths to headers extracted from the email files.
+
+    The whole index is read into memory by open() and the entries added or
+    replaced since then are written back by close().
+
+    """
+
+    def __init__(self, path):
+        """Note path of index database file.
+
+        path - the SQLite database file, created by open() if necessary
+
+        """
+        self.path = path
+        self._entries = None
+        self._changed = None
+        self._blocks = None
+        self._changed_blocks = None
+        self._directories = None
+        self._changed_directories = None
+
+    def open(self):
+        """Create the database if necessary and load the index entries."""
+        try:
+            with sqlite3.connect(self.path) as connection:
+                connection.execute(
+                    "".join(
+                        (
+                            "create table if not exists headers (",
+                            "path text primary key, ",
+                            "mtime integer, ",
+                            "size integer, ",
+                            "sender text, ",
+                            "date text, ",
+                            "messageid text, ",
+                            "filename text)",
+                        )
+                    )
+                )
+                cursor = connection.execute(
+                    "".join(
+                        (
+                            "select path, mtime, size, sender, date, ",
+                            "messageid, filename from headers",
+                        )
+                    )
+                )
+                self._entries = {row[0]: row[1:] for row in cursor}
+                connection.execute(
+                    "".join(
+                        (
+                            "create table if not exists mboxblocks (",
+                            "path text, ",
+                            "mtime integer, ",
+                            "size integer, ",
+                            "block integer, ",
+                            "start integer, ",
+                            "stop integer, ",
+                            "earliest text, ",
+                            "latest text, ",
+                            "primary key (path, block))",
+                        )
+                    )
+                )
+                cursor = connection.execute(
+                    "".join(
+                        (
+                            "select path, mtime, size, start, stop, ",
+                            "earliest, latest from mboxblocks ",
+                            "order by path, block",
+                        )
+                    )
+                )
+                self._blocks = {}
+                for row in cursor:
+                    if row[0] not in self._blocks:
+                        self._blocks[row[0]] = (row[1], row[2], [])
+                    self._blocks[row[0]][-1].append(row[3:])
+                connection.execute(
+                    "".join(
+                        (
+                            "create table if not exists directories (",
+                            "path text primary key, ",
+                            "mtime integer, ",
+                            "names text)",
+                        )
+                    )
+                )
+                cursor = connection.execute(
+                    "select path, mtime, names from directories"
+                )
+                self._directories = {row[0]: row[1:] for row in cursor}
+            connection.close()
+        except sqlite3.Error as exc:
+            raise HeaderIndexError(
+                "".join(("Unable to open header index ", self.path))
+            ) from exc
+        self._changed = {}
+        self._changed_blocks = {}
+        self._changed_directories = {}
+
+    def close(self):
+        """Write the entries added or replaced since open() to database."""
+        if self._changed or self._changed_blocks or self._changed_directories:
+            try:
+                with sqlite3.connect(self.path) as connection:
+                    for path, (
+                        mtime,
+                        size,
+                        blocks,
+                    ) in self._changed_blocks.items():
+                        connection.execute(
+                            "delete from mboxblocks where path = ?", (path,)
+                        )
+                        connection.executemany(
+                            "".join(
+                                (
+                                    "insert into mboxblocks (",
+                                    "path, mtime, size, block, start, stop, ",
+                                    "earliest, latest) ",
+                                    "values (?, ?, ?, ?, ?, ?, ?, ?)",
+                                )
+                            ),
+                            [
+                                (path, mtime, size, number) + tuple(block)
+                                for number, block in enumerate(blocks)
+                            ],
+                        )
+                    connection.executemany(
+                        "".join(
+                            (
+                                "insert or replace into headers (",
+                                "path, mtime, size, sender, date, ",
+                                "messageid, filename) ",
+                                "values (?, ?, ?, ?, ?, ?, ?)",
+                            )
+                        ),
+                        [(k,) + v for k, v in self._changed.items()],
+                    )
+                    connection.executemany(
+                        "".join(
+                            (
+                                "insert or replace into directories (",
+                                "path, mtime, names) values (?, ?, ?)",
+                            )
+                        ),
+                        [
+                            (k,) + v
+                            for k, v in self._changed_directories.items()
+                        ],
+                    )
+                connection.close()
+            except sqlite3.Error as exc:
+                raise HeaderIndexError(
+                    "".join(("Unable to update header index ", self.path))
+                ) from exc
+        self._entries = None
+        self._changed = None
+        self._blocks = None
+        self._changed_blocks = None
+        self._directories = None
+        self._changed_directories = None
+
+    def get(self, path, stat_result):
+        """Return (sender, date, messageid, filename) for path or None.
+
+        None is returned if path is not in the index or the modification
+        time or size in stat_result differ from the values in the index.
+
+        """
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        if entry[0] != stat_result.st_mtime_ns:
+            return None
+        if entry[1] != stat_result.st_size:
+            return None
+        return entry[2:]
+
+    def put(self, path, stat_result, headers):
+        """Add or replace entry for path in the index.
+
+        headers - (sender, date, messageid, filename) tuple
+
+        Headers which cannot be stored as text, usually because they contain
+        undecoded bytes, are not put in the index.
+
+        """
+        for value in headers:
+            if value is None:
+                continue
+            if not isinstance(value, str):
+                return
+            try:
+                value.encode("utf8")
+            except UnicodeEncodeError:
+                return
+        entry = (stat_result.st_mtime_ns, stat_result.st_size) + tuple(headers)
+        self._entries[path] = entry
+        self._changed[path] = entry
+
+    def get_blocks(self, path, stat_result):
+        """Return list of (begin, end, earliest, latest) for path or None.
+
+        None is returned if path is not in the index or the modification
+        time or size in stat_result differ from the values in the index.
+
+        """
+        entry = self._blocks.get(path)
+        if entry is None:
+            return None
+        if entry[0] != stat_result.st_mtime_ns:
+            return None
+        if entry[1] != stat_result.st_size:
+            return None
+        return entry[2]
+
+    def put_blocks(self, path, stat_result, blocks):
+        """Add or replace the date index blocks for mbox file path.
+
+        blocks - list of (begin, end, earliest, latest) tuples
+
+        """
+        entry = (stat_result.st_mtime_ns, stat_result.st_size, list(blocks))
+        self._blocks[path] = entry
+        self._changed_blocks[path] = entry
+
+    def get_names(self, path, stat_result):
+        """Return list of names in directory at path or None.
+
+        None is returned if path is not in the index or the modification
+        time in stat_result differs from the value in the index.
+
+        """
+        entry = self._directories.get(path)
+        if entry is None:
+            return None
+        if entry[0] != stat_result.st_mtime_ns:
+            return None
+        return entry[1].split("\n") if entry[1] else []
+
+    def put_names(self, path, stat_result, names):
+        """Add or replace the names in directory at path in the index.
+
+        The names are not put in the index if the directory was modified
+        within MTIME_GRANULARITY nanoseconds of now, because a name added
+        later might not change the modification time.  Names which cannot be
+        stored in the newline separated list are not put in the index.
+
+        """
+        if stat_result.st_mtime_ns > time.time_ns() - MTIME_GRANULARITY:
+            return
+        for name in names:
+            if "\n" in name:
+                return
+            try:
+                name.encode("utf8")
+            except UnicodeEncodeError:
+                return
+        entry = (stat_result.st_mtime_ns, "\n".join(names))
+        self._directories[path] = entry
+        self._changed_directories[path] = entry
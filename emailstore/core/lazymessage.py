@@ -0,0 +1,111 @@
+# lazymessage.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Email messages which are read from the mail store only when needed.
+
+The headers used to select an email are read, and kept, during selection.
+A LazyMessage answers questions about those headers without reading the
+email again, and reads the whole email only when something else is needed.
+
+The emails read are kept in a MessageCache which holds a limited number of
+the most recently used emails, so showing or copying many selected emails
+does not keep them all in memory at the same time.
+
+"""
+
+from collections import OrderedDict
+
+# The number of email messages kept by a MessageCache by default.  The
+# Select window shows three pages of 50 emails in each of two widgets, and
+# reads the emails in order, so a smaller cache would never be used again
+# when the widgets are redrawn.
+MESSAGE_CACHE_SIZE = 300
+
+
+class MessageCache:
+    """Keep the most recently used email messages."""
+
+    def __init__(self, maxsize=MESSAGE_CACHE_SIZE):
+        """Note maximum number of messages kept."""
+        self.maxsize = maxsize
+        self._messages = OrderedDict()
+
+    def __len__(self):
+        """Return number of messages kept."""
+        return len(self._messages)
+
+    def get(self, key, load):
+        """Return message for key, calling load() if it is not kept.
+
+        key - identity of message, such as it's location in the mail store
+        load - function with no arguments returning the message
+
+        """
+        messages = self._messages
+        try:
+            messages.move_to_end(key)
+            return messages[key]
+        except KeyError:
+            pass
+        message = load()
+        messages[key] = message
+        if len(messages) > self.maxsize:
+            messages.popitem(last=False)
+        return message
+
+    def clear(self):
+        """Forget all messages."""
+        self._messages.clear()
+
+
+class LazyMessage:
+    """Proxy for an email message which is read when first needed.
+
+    Attributes and methods of the email message not provided here are
+    delegated to the message, which is read if it is not in the cache.
+
+    """
+
+    __slots__ = ("key", "_load", "_cache", "headers")
+
+    def __init__(self, key, load, cache, headers=None):
+        """Note how to read the message and the headers already known.
+
+        key - identity of message in cache
+        load - function with no arguments returning the message
+        cache - the MessageCache for the message
+        headers - dict of header name, in lower case, to value for headers
+                  known without reading the message
+
+        """
+        self.key = key
+        self._load = load
+        self._cache = cache
+        self.headers = {} if headers is None else headers
+
+    @property
+    def message(self):
+        """Return the message, reading it if it is not in the cache."""
+        return self._cache.get(self.key, self._load)
+
+    def get(self, name, failobj=None):
+        """Return value of header name, or failobj if it is not present."""
+        value = self.headers.get(name.lower())
+        if value is not None:
+            return value
+        return self.message.get(name, failobj)
+
+    def __getitem__(self, name):
+        """Return value of header name or None if it is not present."""
+        return self.get(name)
+
+    def __contains__(self, name):
+        """Return True if message has header name."""
+        if self.headers.get(name.lower()) is not None:
+            return True
+        return name in self.message
+
+    def __getattr__(self, name):
+        """Return attribute name of the message."""
+        return getattr(self.message, name)
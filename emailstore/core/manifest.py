@@ -0,0 +1,195 @@
+# manifest.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Record the size and digest of each email file in a collected directory.
+
+When a selection is applied again each email already in the collected
+directory must be the same as the email which would be copied.  Rather than
+compare the two byte by byte on every run, the manifest file in the collected
+directory records a BLAKE2b digest of each collected email and of the source
+of the email.
+
+A digest is calculated again only when the size or modification time of the
+collected email file, or of the file holding the source, has changed since
+the digest was recorded.
+
+"""
+
+import os
+import json
+import hashlib
+
+# The name of the manifest file in the collected directory.
+MANIFEST = ".emailstore-manifest"
+
+# Emails, and the manifest, are written to a file with this prefix in the
+# collected directory and renamed when complete, so a collected email is
+# never partly written and partly written files are easily ignored.
+PARTIAL_PREFIX = ".partial-"
+
+_VERSION = 1
+
+# Indicies of items in manifest entries.
+_SIZE = 0
+_MTIME = 1
+_DIGEST = 2
+_SOURCE = 3
+_SOURCE_SIZE = 4
+_SOURCE_MTIME = 5
+_SOURCE_DIGEST = 6
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    """Return hex BLAKE2b digest of content of file at path."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as file_open:
+        while True:
+            chunk = file_open.read(_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_digest(data):
+    """Return hex BLAKE2b digest of data."""
+    return hashlib.blake2b(data).hexdigest()
+
+
+class Manifest:
+    """Digests of email files in a collected directory and their sources.
+
+    The source of an email is identified by a string, such as the path of the
+    email file or the location of the email in a mbox file, and the size and
+    modification time of the file holding the source.
+
+    """
+
+    def __init__(self, directory):
+        """Note collected directory and read the manifest if it exists."""
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST)
+        self._entries = {}
+        self._changed = False
+        try:
+            with open(self.path, "r", encoding="utf8") as file_open:
+                manifest = json.load(file_open)
+        except (OSError, ValueError):
+            return
+        if not isinstance(manifest, dict):
+            return
+        if manifest.get("version") != _VERSION:
+            return
+        entries = manifest.get("files")
+        if isinstance(entries, dict):
+            self._entries = entries
+
+    def save(self):
+        """Write manifest file if any entries have changed."""
+        if not self._changed:
+            return
+        partial = os.path.join(
+            self.directory, "".join((PARTIAL_PREFIX, MANIFEST))
+        )
+        with open(partial, "w", encoding="utf8") as file_open:
+            json.dump({"version": _VERSION, "files": self._entries}, file_open)
+        os.replace(partial, self.path)
+        self._changed = False
+
+    def _collected_digest(self, filename, stat_result):
+        """Return digest of collected email filename and update entry."""
+        path = os.path.join(self.directory, filename)
+        entry = self._entries.get(filename)
+        if (
+            entry is not None
+            and entry[_SIZE] == stat_result.st_size
+            and entry[_MTIME] == stat_result.st_mtime_ns
+        ):
+            return entry[_DIGEST]
+        digest = file_digest(path)
+        if entry is None:
+            entry = [None] * 7
+            self._entries[filename] = entry
+        entry[_SIZE] = stat_result.st_size
+        entry[_MTIME] = stat_result.st_mtime_ns
+        entry[_DIGEST] = digest
+        self._changed = True
+        return digest
+
+    def _source_digest(self, filename, source, source_stat):
+        """Return recorded digest of source of filename or None."""
+        entry = self._entries[filename]
+        if (
+            entry[_SOURCE] == source
+            and entry[_SOURCE_SIZE] == source_stat.st_size
+            and entry[_SOURCE_MTIME] == source_stat.st_mtime_ns
+        ):
+            return entry[_SOURCE_DIGEST]
+        return None
+
+    def _set_source_digest(self, filename, source, source_stat, digest):
+        """Record digest of source of filename."""
+        entry = self._entries[filename]
+        entry[_SOURCE] = source
+        entry[_SOURCE_SIZE] = source_stat.st_size
+        entry[_SOURCE_MTIME] = source_stat.st_mtime_ns
+        entry[_SOURCE_DIGEST] = digest
+        self._changed = True
+
+    def is_same(
+        self,
+        filename,
+        source,
+        source_stat,
+        source_data=None,
+        fallback_data=None,
+    ):
+        """Return True if collected email filename is same as it's source.
+
+        source - identity of the source of the email
+        source_stat - os.stat() result for the file holding the source
+        source_data - function returning the bytes of the email, or None if
+                      source is the path of a file containing just the email
+        fallback_data - function returning another representation of the
+                        email's bytes, tried if the bytes from source_data
+                        are not the same as the collected email, or None
+
+        """
+        stat_result = os.stat(os.path.join(self.directory, filename))
+        if source_data is None and stat_result.st_size != source_stat.st_size:
+            return False
+        collected = self._collected_digest(filename, stat_result)
+        digest = self._source_digest(filename, source, source_stat)
+        if digest is not None:
+            return collected == digest
+        if source_data is None:
+            digest = file_digest(source)
+        else:
+            digest = bytes_digest(source_data())
+        if digest != collected and fallback_data is not None:
+            fallback_digest = bytes_digest(fallback_data())
+            if fallback_digest == collected:
+                digest = fallback_digest
+        self._set_source_digest(filename, source, source_stat, digest)
+        return collected == digest
+
+    def record(self, filename, source, source_stat, digest):
+        """Record the email filename just copied from source.
+
+        digest - the digest of the bytes written to filename
+
+        """
+        stat_result = os.stat(os.path.join(self.directory, filename))
+        self._entries[filename] = [
+            stat_result.st_size,
+            stat_result.st_mtime_ns,
+            digest,
+            source,
+            source_stat.st_size,
+            source_stat.st_mtime_ns,
+            digest,
+        ]
+        self._changed = True
@@ -0,0 +1,342 @@
+# mboxindex.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Index the messages in a mbox file by byte offset.
+
+The mailbox module's mbox class is not used because the selection process
+would then keep every message in the mbox files as a parsed Message object
+until the selection ends.
+
+Instead each mbox file is read once, and a compact MboxEntry is kept for
+each message holding the byte range of the message in the file and the
+header values needed to select messages.  The message is read from the mbox
+file again, only when needed, when copying or displaying the message.
+
+The rules used by the mailbox module's mbox class to find the start and end
+of each message are followed.
+
+Two scanners are provided: scan_mbox() reads the mbox file line by line and
+scan_mbox_mmap() searches a memory map of the mbox file for the "From "
+lines which start messages.  The memory map can be kept to read messages
+later as memoryview slices of the map.
+
+Both scanners can be told to scan just a byte range of the mbox file which
+starts at a "From " line and ends at a "From " line or the end of the file.
+date_blocks() divides the messages found by a full scan into blocks with
+the range of dates of the messages in each block, and block_ranges() picks
+the byte ranges which need scanning to find messages between two dates.
+
+"""
+
+import os
+import mmap
+
+_LINESEP = os.linesep.encode()
+
+# The number of messages in each block of a mbox file's date index.
+BLOCK_SIZE = 1000
+
+
+class MboxEntry:
+    """Location and selection headers of a message in a mbox file."""
+
+    __slots__ = (
+        "mailstore",
+        "start",
+        "stop",
+        "sender",
+        "date",
+        "messageid",
+        "filename",
+    )
+
+    def __init__(self, mailstore, start, stop, headers):
+        """Note location and selection headers of a message.
+
+        mailstore - path of the mbox file containing the message
+        start - offset of the message's "From " line in mailstore
+        stop - offset of the byte after the message in mailstore
+        headers - (sender, date, messageid, filename) tuple
+
+        """
+        self.mailstore = mailstore
+        self.start = start
+        self.stop = stop
+        self.sender, self.date, self.messageid, self.filename = headers
+
+    def __repr__(self):
+        """Return representation of message location."""
+        return "".join(
+            (
+                self.__class__.__name__,
+                "(",
+                repr(self.mailstore),
+                ", ",
+                str(self.start),
+                ", ",
+                str(self.stop),
+                ")",
+            )
+        )
+
+    def read(self, mboxmap=None):
+        """Return (from line, message bytes) read from mbox file.
+
+        mboxmap - a MboxMap of the mbox file or None
+
+        The from line does not include the line separator and the line
+        separators in the message bytes are converted to '\\n'.
+
+        The message bytes are a memoryview slice of mboxmap if given.
+
+        """
+        if mboxmap is not None and _LINESEP == b"\n":
+            eol = mboxmap.map.find(b"\n", self.start, self.stop)
+            if eol == -1:
+                eol = self.stop
+            return (
+                bytes(mboxmap.view[self.start : eol]),
+                mboxmap.view[min(eol + 1, self.stop) : self.stop],
+            )
+        with open(self.mailstore, "rb") as file_open:
+            file_open.seek(self.start)
+            from_line = file_open.readline().replace(_LINESEP, b"")
+            data = file_open.read(self.stop - file_open.tell())
+        return from_line, data.replace(_LINESEP, b"\n")
+
+    def get_message(self, factory, mboxmap=None):
+        """Return message read from mbox file as a factory instance.
+
+        factory - a mailbox.mboxMessage class or subclass
+        mboxmap - a MboxMap of the mbox file or None
+
+        """
+        from_line, data = self.read(mboxmap=mboxmap)
+        message = factory(bytes(data))
+        message.set_from(from_line[5:].decode("ascii"))
+        return message
+
+
+def scan_mbox(mailstore, header_parser, begin=0, end=None):
+    """Return list of MboxEntry instances for messages in mailstore.
+
+    mailstore - path of mbox file
+    header_parser - function returning (sender, date, messageid, filename)
+                    tuple given the bytes of a message's headers
+    begin - offset at which to start scanning, 0 or a "From " line
+    end - offset at which to stop scanning, a "From " line or None for the
+          end of the file
+
+    The headers are the lines after the "From " line up to, and including,
+    the first blank line.
+
+    FileNotFoundError is raised if mailstore does not exist.
+
+    """
+    entries = []
+    position = begin
+    start = None
+    headers = None
+    in_headers = False
+    last_was_empty = False
+    with open(mailstore, "rb") as file_open:
+        file_open.seek(begin)
+        for line in file_open:
+            if end is not None and position >= end:
+                break
+            if line.startswith(b"From "):
+                if start is not None:
+                    entries.append(
+                        MboxEntry(
+                            mailstore,
+                            start,
+                            (
+                                position - len(_LINESEP)
+                                if last_was_empty
+                                else position
+                            ),
+                            header_parser(b"".join(headers)),
+                        )
+                    )
+                start = position
+                headers = []
+                in_headers = True
+                last_was_empty = False
+            else:
+                last_was_empty = line == _LINESEP
+                if start is not None and in_headers:
+                    headers.append(line.replace(_LINESEP, b"\n"))
+                    if line in (b"\n", b"\r\n"):
+                        in_headers = False
+            position += len(line)
+    if start is not None:
+        entries.append(
+            MboxEntry(
+                mailstore,
+                start,
+                position - len(_LINESEP) if last_was_empty else position,
+                header_parser(b"".join(headers)),
+            )
+        )
+    return entries
+
+
+class MboxMap:
+    """Read-only memory map of a mbox file."""
+
+    def __init__(self, mailstore):
+        """Map mailstore into memory.
+
+        FileNotFoundError is raised if mailstore does not exist.
+
+        """
+        self.mailstore = mailstore
+        with open(mailstore, "rb") as file_open:
+            if os.fstat(file_open.fileno()).st_size:
+                self.map = mmap.mmap(
+                    file_open.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            else:
+                self.map = b""
+        self.view = memoryview(self.map)
+
+    def close(self):
+        """Release the memory map."""
+        self.view.release()
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+
+
+def scan_mbox_mmap(mboxmap, header_parser, begin=0, end=None):
+    """Return list of MboxEntry instances for messages in mboxmap.
+
+    mboxmap - a MboxMap of the mbox file
+    header_parser - function returning (sender, date, messageid, filename)
+                    tuple given the bytes of a message's headers
+    begin - offset at which to start scanning, 0 or a "From " line
+    end - offset at which to stop scanning, a "From " line or None for the
+          end of the file
+
+    The headers, a memoryview slice of mboxmap, are the lines after the
+    "From " line up to, and including, the first blank line.
+
+    The result is the same as scan_mbox() for the mbox file, which is used
+    if the line separator is not '\\n'.
+
+    """
+    if _LINESEP != b"\n":
+        return scan_mbox(mboxmap.mailstore, header_parser, begin, end)
+    mailstore = mboxmap.mailstore
+    buffer = mboxmap.map
+    view = mboxmap.view
+    size = len(buffer) if end is None else end
+
+    # The "From " line at size, if any, must be found by the search for the
+    # line after the last message in the range.
+    limit = min(size + 5, len(buffer))
+    entries = []
+    if buffer[begin : begin + 5] == b"From ":
+        start = begin
+    else:
+        start = buffer.find(b"\nFrom ", begin, limit)
+        start = None if start == -1 else start + 1
+    while start is not None and start < size:
+        end = buffer.find(b"\nFrom ", start, limit)
+        if end == -1:
+            end = size
+            next_start = None
+        else:
+            end += 1
+            next_start = end
+
+        # The line before the next "From " line, or the last line in the
+        # file, is not part of the message if it is a blank line.
+        if end > start + 1 and buffer[end - 2 : end] == b"\n\n":
+            stop = end - 1
+        else:
+            stop = end
+
+        eol = buffer.find(b"\n", start, end)
+        if eol == -1:
+            header_start = header_stop = end
+        else:
+            header_start = eol + 1
+            header_stop = end
+            blank = buffer.find(b"\n\n", eol, end)
+            if blank != -1:
+                header_stop = blank + 2
+            blank = buffer.find(b"\n\r\n", eol, header_stop)
+            if blank != -1:
+                header_stop = blank + 3
+        entries.append(
+            MboxEntry(
+                mailstore,
+                start,
+                stop,
+                header_parser(view[header_start:header_stop]),
+            )
+        )
+        start = next_start
+    return entries
+
+
+def date_blocks(entries, size, block_size=BLOCK_SIZE):
+    """Return list of (begin, end, earliest, latest) for blocks of entries.
+
+    entries - MboxEntry instances from a full scan of a mbox file
+    size - the size of the mbox file
+    block_size - the number of messages in each block
+
+    begin and end are the byte range of the block, and earliest and latest
+    are the lowest and highest 'yyyymmdd' date prefixes of the filenames of
+    the messages in the block.  earliest and latest are None if no message
+    in the block has a filename.
+
+    The byte ranges of the blocks cover the mbox file from the first
+    message to the end of the file.
+
+    """
+    blocks = []
+    for index in range(0, len(entries), block_size):
+        block = entries[index : index + block_size]
+        dates = [e.filename[:8] for e in block if e.filename]
+        if index + block_size < len(entries):
+            end = entries[index + block_size].start
+        else:
+            end = size
+        blocks.append(
+            (
+                block[0].start,
+                end,
+                min(dates) if dates else None,
+                max(dates) if dates else None,
+            )
+        )
+    return blocks
+
+
+def block_ranges(blocks, earliest=None, latest=None):
+    """Return list of (begin, end) byte ranges of blocks to be scanned.
+
+    blocks - the list of (begin, end, earliest, latest) from date_blocks()
+    earliest, latest - the 'yyyymmdd' date range of wanted messages, either
+                       can be None for no limit
+
+    Blocks with no dated messages, or no messages in the date range, are
+    not scanned.  Adjacent blocks are merged into one range.
+
+    """
+    ranges = []
+    for begin, end, first, last in blocks:
+        if first is None:
+            continue
+        if earliest is not None and last < earliest:
+            continue
+        if latest is not None and first > latest:
+            continue
+        if ranges and ranges[-1][1] == begin:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((begin, end))
+    return ranges
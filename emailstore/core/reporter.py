@@ -0,0 +1,74 @@
+# reporter.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Tell the user about problems and progress while collecting emails.
+
+An EmailCollector is given a Reporter, or an instance of a subclass, rather
+than displaying dialogues itself.  So the core modules do not import tkinter
+and can be used in scripts, batch jobs, and worker processes.
+
+The Reporter for the user interface is in the emailstore.gui package.
+
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ReporterError(Exception):
+    """Exception class for reporter module."""
+
+
+class Reporter:
+    """Ignore all reports.
+
+    Subclasses override information() and progress() to display reports.
+
+    """
+
+    def information(self, title, message):
+        """Report a problem which stops, or limits, the action being done.
+
+        title - short description of the action
+        message - description of the problem
+
+        """
+
+    def progress(self, stage, **counts):
+        """Report progress of stage of collecting emails.
+
+        stage - 'select' or 'copy'
+        counts - number of items, such as scanned, matched, copied, or
+                 bytes, dealt with so far in stage
+
+        """
+
+
+class LoggingReporter(Reporter):
+    """Log reports: the Reporter used by default."""
+
+    def __init__(self, log=None):
+        """Note the logger, default the logger for reporter module."""
+        self.log = logger if log is None else log
+
+    def information(self, title, message):
+        """Log problem as a warning."""
+        self.log.warning("%s: %s", title, " ".join(message.split()))
+
+    def progress(self, stage, **counts):
+        """Log progress at debug level."""
+        self.log.debug(
+            "%s: %s",
+            stage,
+            ", ".join("=".join((k, str(v))) for k, v in counts.items()),
+        )
+
+
+class RaisingReporter(LoggingReporter):
+    """Raise ReporterError for problems and log progress."""
+
+    def information(self, title, message):
+        """Raise ReporterError describing problem."""
+        raise ReporterError(": ".join((title, " ".join(message.split()))))
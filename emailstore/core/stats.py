@@ -0,0 +1,83 @@
+# stats.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Count and time the stages of collecting emails.
+
+An EmailCollector is given a CollectorStats to record how many directories,
+files, messages, and bytes each stage deals with, and how long it takes.
+By default it is given a NullStats which records nothing.
+
+The stages are:
+
+list - listing the directories of an Opera mail store
+headers - reading the headers of emails, including generating filenames
+compare - comparing the headers with the selection rules
+copy - copying selected emails to the collected directory
+show - displaying the selected emails in the user interface
+
+Headers are often read in worker processes, so the time for generating the
+filenames is part of the headers stage rather than a stage of it's own.
+
+"""
+
+import json
+import time
+import contextlib
+
+
+class CollectorStats:
+    """Record counters and timings of the stages of collecting emails."""
+
+    def __init__(self):
+        """Start with no counts and no time spent in any stage."""
+        self.counters = {}
+        self.seconds = {}
+        self.calls = {}
+
+    def count(self, name, number=1):
+        """Add number to the counter called name."""
+        self.counters[name] = self.counters.get(name, 0) + number
+
+    @contextlib.contextmanager
+    def timer(self, stage):
+        """Add the time spent in the with statement's body to stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] = (
+                self.seconds.get(stage, 0) + time.perf_counter() - start
+            )
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def as_dict(self):
+        """Return dict of counters, seconds, and calls for each stage."""
+        return {
+            "counters": dict(self.counters),
+            "seconds": dict(self.seconds),
+            "calls": dict(self.calls),
+        }
+
+    def write_json(self, path):
+        """Write the counters and timings to file at path as JSON."""
+        with open(path, "w", encoding="utf8") as file_open:
+            json.dump(self.as_dict(), file_open, indent=1, sort_keys=True)
+            file_open.write("\n")
+
+    def clear(self):
+        """Forget all counts and timings."""
+        self.counters.clear()
+        self.seconds.clear()
+        self.calls.clear()
+
+
+class NullStats(CollectorStats):
+    """Record nothing: the CollectorStats used by default."""
+
+    def count(self, name, number=1):
+        """Do nothing."""
+
+    def timer(self, stage):
+        """Return a context manager which does nothing."""
+        return contextlib.nullcontext()
@@ -6,8 +6,16 @@
 
 import unittest
 import os
+import io
+import tempfile
+import asyncio
+import concurrent.futures
+import shutil
+import multiprocessing
 
 from .. import emailcollector
+from .. import reporter
+from .. import stats
 
 
 class EmailCollector(unittest.TestCase):
@@ -29,7 +37,10 @@ class EmailCollector(unittest.TestCase):
         self.assertEqual(ec.parent, None)
         self.assertEqual(ec.criteria, None)
         self.assertEqual(ec.email_client, None)
-        self.assertEqual(len(ec.__dict__), 6)
+        self.assertIsInstance(ec.reporter, reporter.LoggingReporter)
+        self.assertIsInstance(ec.stats, stats.NullStats)
+        self.assertEqual(ec.mp_context, None)
+        self.assertEqual(len(ec.__dict__), 11)
 
     def test_parse_01(self):
         ec = emailcollector.EmailCollector(
@@ -50,6 +61,610 @@ class EmailCollector(unittest.TestCase):
         self.assertEqual(ec.parse(), True)
 
 
+_OPERA_EMAIL = b"".join(
+    (
+        b"From someone@example.com Mon Jun  2 10:11:12 2014\n",
+        b"From: A Sender <a.sender@example.com>\n",
+        b"Date: Mon, 02 Jun 2014 10:11:12 +0100\n",
+        b"Message-ID: <1@example.com>\n",
+        b"\n",
+        b"Body text\n",
+    )
+)
+
+
+class ReadMessageHeaders(unittest.TestCase):
+    def test__read_header_bytes_01(self):
+        file_open = io.BytesIO(_OPERA_EMAIL)
+        self.assertEqual(
+            emailcollector._read_header_bytes(file_open),
+            _OPERA_EMAIL[: _OPERA_EMAIL.index(b"\n\n") + 2],
+        )
+        self.assertEqual(file_open.read(), b"Body text\n")
+
+    def test__get_opera_email_headers_01(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "1.mbs")
+            with open(path, "wb") as file_open:
+                file_open.write(_OPERA_EMAIL)
+            self.assertEqual(
+                emailcollector._get_opera_email_headers(path),
+                (
+                    "a.sender@example.com",
+                    "Mon, 02 Jun 2014 10:11:12 +0100",
+                    "<1@example.com>",
+                    "20140602101112a.sender@example.com+0100.mbs",
+                ),
+            )
+            with open(path, "wb") as file_open:
+                file_open.write(b"Subject: no sender\n\nBody text\n")
+            self.assertEqual(
+                emailcollector._get_opera_email_headers(path),
+                ("", None, None, None),
+            )
+
+
+class CopyFileAtomic(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "1.mbs")
+        with open(self.source, "wb") as file_open:
+            file_open.write(b"From: a@b.c\n\nBody\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test__copy_file_atomic_01(self):
+        target = os.path.join(self.directory.name, "target.mbs")
+        emailcollector._copy_file_atomic(self.source, target)
+        with open(target, "rb") as file_open:
+            self.assertEqual(file_open.read(), b"From: a@b.c\n\nBody\n")
+        self.assertEqual(
+            emailcollector._list_collected(self.directory.name),
+            {"1.mbs", "target.mbs"},
+        )
+
+    def test__copy_file_atomic_02(self):
+        target = os.path.join(self.directory.name, "target.mbs")
+        self.assertRaises(
+            FileNotFoundError,
+            emailcollector._copy_file_atomic,
+            os.path.join(self.directory.name, "2.mbs"),
+            target,
+        )
+        self.assertEqual(os.listdir(self.directory.name), ["1.mbs"])
+
+    def test__list_collected_01(self):
+        with open(
+            os.path.join(self.directory.name, ".partial-2.mbs"), "wb"
+        ) as file_open:
+            file_open.write(b"From: a@b.c\n")
+        manifest = emailcollector.Manifest(self.directory.name)
+        manifest.record("1.mbs", self.source, os.stat(self.source), "0")
+        manifest.save()
+        with open(
+            os.path.join(
+                self.directory.name, ".partial-" + emailcollector.MANIFEST
+            ),
+            "w",
+        ) as file_open:
+            file_open.write("{")
+        self.assertEqual(
+            emailcollector._list_collected(self.directory.name), {"1.mbs"}
+        )
+
+
+class OperaCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = emailcollector._OperaEmailClient(
+            directory=self.directory.name,
+            parent=None,
+            collected="collected",
+            checkpoint="checkpoint.txt",
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test__opera_file_number_01(self):
+        self.assertEqual(emailcollector._opera_file_number("123.mbs"), 123)
+        self.assertEqual(emailcollector._opera_file_number("x.mbs"), -1)
+
+    def test_read_checkpoint_01(self):
+        self.assertEqual(self.client.read_checkpoint(), {})
+
+    def test_write_checkpoint_01(self):
+        self.client._newest_seen = {"account1": ((2014, 6, 3), 18)}
+        self.client.write_checkpoint()
+        with open(self.client.checkpoint) as file_open:
+            self.assertEqual(file_open.read(), "account1 2014-06-03 18\n")
+        self.client._newest_seen = {
+            "account1": ((2014, 6, 2), 20),
+            "account2": ((2014, 5, 1), 2),
+        }
+        self.client.write_checkpoint()
+        self.assertEqual(
+            self.client.read_checkpoint(),
+            {
+                "account1": ((2014, 6, 3), 18),
+                "account2": ((2014, 5, 1), 2),
+            },
+        )
+
+    def test_read_checkpoint_02(self):
+        with open(self.client.checkpoint, "w") as file_open:
+            file_open.write("account1 2014-13-03 18\n")
+        self.assertRaises(
+            emailcollector.EmailCollectorError, self.client.read_checkpoint
+        )
+
+    def test_get_emails_01(self):
+        mailstore = os.path.join(self.directory.name, "mail")
+        for day, name in (
+            ("2014/06/01", "0.mbs"),
+            ("2014/06/02", "1.mbs"),
+            ("2014/06/02", "2.mbs"),
+            ("2014/06/02", "5.mbs"),
+            ("2014/06/03", "6.mbs"),
+        ):
+            os.makedirs(
+                os.path.join(mailstore, "account1", day), exist_ok=True
+            )
+            with open(
+                os.path.join(mailstore, "account1", day, name), "wb"
+            ) as file_open:
+                file_open.write(b"From: a@b.c\n")
+        accountdefs = os.path.join(self.directory.name, "accounts.ini")
+        with open(accountdefs, "wb") as file_open:
+            file_open.write(b"[Account1]\nEmail=a@b.c\n")
+        with open(self.client.checkpoint, "w") as file_open:
+            file_open.write("account1 2014-06-02 2\n")
+        self.client.mailstore = mailstore
+        self.client.accountdefs = accountdefs
+        self.assertEqual(
+            self.client.get_emails(),
+            [
+                (mailstore, "account1", "2014", "06", "02", "5.mbs"),
+                (mailstore, "account1", "2014", "06", "03", "6.mbs"),
+            ],
+        )
+        self.assertEqual(
+            self.client._newest_seen, {"account1": ((2014, 6, 3), 6)}
+        )
+
+
+class OperaAccounts(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = emailcollector._OperaEmailClient(
+            directory=self.directory.name,
+            parent=None,
+            collected="collected",
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_accounts_01(self):
+        accountdefs = os.path.join(self.directory.name, "accounts.ini")
+        with open(accountdefs, "wb") as file_open:
+            file_open.write(b"[Account1]\nEmail=a@b.c\n")
+        self.client.accountdefs = accountdefs
+        accounts = self.client.get_accounts()
+        self.assertEqual(accounts, {"account1": "a@b.c"})
+        self.assertIs(self.client.get_accounts(), accounts)
+        with open(accountdefs, "wb") as file_open:
+            file_open.write(
+                b"[Account1]\nEmail=a@b.c\n[Account2]\nEmail=d@e.f\n"
+            )
+        self.assertEqual(
+            self.client.get_accounts(),
+            {"account1": "a@b.c", "account2": "d@e.f"},
+        )
+
+
+class OperaGetEmails(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.client = emailcollector._OperaEmailClient(
+            directory=self.directory.name,
+            parent=None,
+            collected="collected",
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_emails_01(self):
+        mailstore = os.path.join(self.directory.name, "mail")
+        for day, name in (
+            ("2014/06/03", "3.mbs"),
+            ("2014/06/02", "2.mbs"),
+            ("2014/05/31", "1.mbs"),
+            ("2013/12/01", "0.mbs"),
+        ):
+            os.makedirs(os.path.join(mailstore, "account1", day))
+            with open(
+                os.path.join(mailstore, "account1", day, name), "wb"
+            ) as file_open:
+                file_open.write(b"From: a@b.c\n")
+        with open(
+            os.path.join(mailstore, "account1", "2014", "notes.txt"), "wb"
+        ) as file_open:
+            file_open.write(b"Not a month directory\n")
+        accountdefs = os.path.join(self.directory.name, "accounts.ini")
+        with open(accountdefs, "wb") as file_open:
+            file_open.write(b"[Account1]\nEmail=a@b.c\n")
+        self.client.mailstore = mailstore
+        self.client.accountdefs = accountdefs
+        self.client.earliestdate = "2014-06-01"
+        self.client.mostrecentdate = "2014-06-02"
+        self.assertEqual(
+            self.client.get_emails(),
+            [(mailstore, "account1", "2014", "06", "02", "2.mbs")],
+        )
+        self.client.earliestdate = None
+        self.client.mostrecentdate = None
+        self.assertEqual(
+            [e[-1] for e in self.client.get_emails()],
+            ["0.mbs", "1.mbs", "2.mbs", "3.mbs"],
+        )
+
+
+_MBOX = b"".join(
+    (
+        b"From a@b.c Mon Jun  2 10:11:12 2014\n",
+        b"From: a@b.c\n",
+        b"Date: Mon, 2 Jun 2014 10:11:12 +0100\n",
+        b"Message-ID: <1@b.c>\n",
+        b"\n",
+        b"Body one\n",
+        b"\n",
+        b"From d@e.f Mon Jun  2 10:11:13 2014\n",
+        b"From: d@e.f\n",
+        b"Date: Mon, 2 Jun 2014 10:11:13 +0100\n",
+        b"Message-ID: <2@e.f>\n",
+        b"\n",
+        b"Body two\n",
+    )
+)
+
+
+class _ImmediateExecutor(concurrent.futures.Executor):
+    """Executor which runs the function before submit() returns."""
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = concurrent.futures.Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def _mbox_collector(directory):
+    """Return parsed EmailCollector for _MBOX written in directory."""
+    with open(os.path.join(directory, "test.mbox"), "wb") as file_open:
+        file_open.write(_MBOX)
+    ec = emailcollector.EmailCollector(
+        directory,
+        configuration="\n".join(
+            (
+                "collected collected",
+                "mailboxstyle mbox",
+                " ".join(
+                    ("mboxmailstore", os.path.join(directory, "test.mbox"))
+                ),
+            )
+        ),
+    )
+    ec.parse()
+    return ec
+
+
+class EmailCollector_async(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ec = _mbox_collector(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_aselected_emails_01(self):
+        emails = asyncio.run(self.ec.aselected_emails())
+        self.assertEqual(
+            [e[0] for e in emails],
+            ["20140602101112a@b.c+0100.mbs", "20140602101113d@e.f+0100.mbs"],
+        )
+
+    def test_acopy_emails_01(self):
+        self.assertEqual(asyncio.run(self.ec.acopy_emails()), 2)
+        self.assertEqual(
+            emailcollector._list_collected(self.ec.outputdirectory),
+            {"20140602101112a@b.c+0100.mbs", "20140602101113d@e.f+0100.mbs"},
+        )
+
+    def test_aiter_selected_01(self):
+        async def names():
+            return [e[0] async for e in self.ec.aiter_selected()]
+
+        self.assertEqual(
+            asyncio.run(names()),
+            ["20140602101112a@b.c+0100.mbs", "20140602101113d@e.f+0100.mbs"],
+        )
+
+    def test_cancel_01(self):
+        self.ec.cancel()
+        self.assertRaises(
+            emailcollector.EmailCollectorCancelled,
+            lambda: self.ec.selected_emails,
+        )
+        self.assertEqual(len(self.ec.selected_emails), 2)
+
+    def test_clear_cancel_01(self):
+        self.ec.cancel()
+        self.ec.clear_cancel()
+        self.assertEqual(len(self.ec.selected_emails), 2)
+
+    def test_cancel_03(self):
+        async def copy():
+            task = asyncio.ensure_future(
+                self.ec.acopy_emails(_ImmediateExecutor())
+            )
+            await asyncio.sleep(0)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            shutil.rmtree(self.ec.outputdirectory)
+            return await self.ec.acopy_emails()
+
+        self.assertEqual(asyncio.run(copy()), 2)
+
+    def test_cancel_02(self):
+        self.ec.cancel()
+        self.assertRaises(
+            emailcollector.EmailCollectorCancelled,
+            asyncio.run,
+            self.ec.aselected_emails(),
+        )
+        self.assertEqual(len(asyncio.run(self.ec.aselected_emails())), 2)
+
+
+class EmailCollector_iter(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ec = _mbox_collector(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_iter_selected_01(self):
+        emails = list(self.ec.iter_selected())
+        self.assertEqual(len(emails), 2)
+        filename, source, message = emails[0]
+        self.assertEqual(filename, "20140602101112a@b.c+0100.mbs")
+        self.assertEqual(
+            source,
+            os.path.join(self.directory.name, "test.mbox") + "[0:115]",
+        )
+        self.assertIsInstance(message, emailcollector.LazyMessage)
+        self.assertEqual(message["From"], "a@b.c")
+        self.assertEqual(message.get_payload(), "Body one\n")
+
+    def test_iter_selected_02(self):
+        emails = list(self.ec.iter_selected(keep=True))
+        self.assertEqual(
+            [e[0] for e in emails],
+            [e[0] for e in self.ec.email_client.selected_emails],
+        )
+
+
+class EmailCollector_exclude(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ec = _mbox_collector(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_exclude_email_01(self):
+        selected = self.ec.selected_emails
+        self.ec.exclude_email("20140602101112a@b.c+0100.mbs")
+        self.assertEqual(
+            self.ec.excluded_emails, {"20140602101112a@b.c+0100.mbs"}
+        )
+        self.ec.include_email("20140602101112a@b.c+0100.mbs")
+        self.ec.include_email("20140602101112a@b.c+0100.mbs")
+        self.assertEqual(self.ec.excluded_emails, set())
+        self.assertIs(self.ec.selected_emails, selected)
+
+    def test_message_filename_01(self):
+        self.assertEqual(
+            [
+                self.ec.message_filename(m)
+                for m in self.ec.selected_emails_text
+            ],
+            [e[0] for e in self.ec.selected_emails],
+        )
+        self.ec.exclude_email("20140602101112a@b.c+0100.mbs")
+        self.assertIs(self.ec.excluded_emails, self.ec.excluded_emails)
+
+
+class EmailCollector_stats(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ec = _mbox_collector(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_stats_01(self):
+        self.ec.stats = stats.CollectorStats()
+        self.assertEqual(self.ec.copy_emails(), 2)
+        counters = self.ec.stats.counters
+        self.assertEqual(counters["messages_parsed"], 2)
+        self.assertEqual(counters["filenames_generated"], 2)
+        self.assertEqual(counters["messages_matched"], 2)
+        self.assertEqual(counters["files_copied"], 2)
+        self.assertEqual(
+            counters["bytes_written"],
+            sum(
+                os.path.getsize(os.path.join(self.ec.outputdirectory, e[0]))
+                for e in self.ec.selected_emails
+            ),
+        )
+        self.assertEqual(set(self.ec.stats.seconds), {"headers", "copy"})
+
+
+class EmailCollector_maps(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ec = _mbox_collector(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_release_maps_01(self):
+        self.ec.selected_emails
+        self.assertEqual(len(self.ec.email_client._mbox_maps), 1)
+        self.assertEqual(self.ec.copy_emails(), 2)
+        self.assertEqual(self.ec.email_client._mbox_maps, {})
+
+    def test_release_maps_02(self):
+        self.ec.selected_emails
+        client = self.ec.email_client
+        self.assertEqual(self.ec._create_email_client(), True)
+        self.assertIsNot(self.ec.email_client, client)
+        self.assertEqual(client._mbox_maps, {})
+
+    def test_release_maps_03(self):
+        filename, entry = self.ec.selected_emails[0]
+        data = self.ec.email_client._get_message_bytes(entry)
+        self.ec.release_maps()
+        self.assertEqual(self.ec.email_client._mbox_maps, {})
+        self.assertEqual(bytes(data), entry.read()[-1])
+        self.assertEqual(len(self.ec.selected_emails_text), 2)
+
+
+_OPERA_EMAILS = (
+    ("account1", "2014/06/01", 1, "a@b.c", "Sun, 1 Jun 2014 09:00:00 +0100"),
+    ("account1", "2014/06/02", 2, "d@e.f", "Mon, 2 Jun 2014 09:00:00 +0100"),
+    ("account2", "2014/06/02", 3, "g@h.i", "Mon, 2 Jun 2014 10:00:00 +0100"),
+    ("account2", "2014/06/03", 4, "a@b.c", "Tue, 3 Jun 2014 09:00:00 +0100"),
+    ("account1", "2014/06/03", 5, "d@e.f", None),
+    ("account2", "2014/06/04", 6, "A <a@b.c>", "4 Jun 2014 09:00 -0500"),
+)
+
+
+def _opera_configuration(directory):
+    """Return configuration for _OPERA_EMAILS written in directory."""
+    mailstore = os.path.join(directory, "mail")
+    for account, day, number, sender, date in _OPERA_EMAILS:
+        path = os.path.join(mailstore, account, day)
+        os.makedirs(path, exist_ok=True)
+        headers = ["From: " + sender]
+        if date is not None:
+            headers.append("Date: " + date)
+        headers.append("Message-ID: <" + str(number) + "@b.c>")
+        with open(os.path.join(path, str(number) + ".mbs"), "wb") as file_open:
+            file_open.write("\n".join(headers + ["", "Body", ""]).encode())
+    accountdefs = os.path.join(directory, "accounts.ini")
+    with open(accountdefs, "wb") as file_open:
+        file_open.write(b"[Account1]\nEmail=x@y.z\n[Account2]\nEmail=w@y.z\n")
+    return "\n".join(
+        (
+            "collected collected",
+            "mailboxstyle opera",
+            "operamailstore " + mailstore,
+            "operaaccountdefs " + accountdefs,
+            "emailsfrom a@b.c",
+            "emailsfrom d@e.f",
+        )
+    )
+
+
+class EmailCollector_opera(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.configuration = _opera_configuration(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _select(self, *extra, mp_context=None):
+        ec = emailcollector.EmailCollector(
+            self.directory.name,
+            configuration="\n".join((self.configuration,) + extra),
+            mp_context=mp_context,
+        )
+        self.assertEqual(ec.parse(), True)
+        return [e[-1] for e in ec.selected_emails], ec.filename_map
+
+    def test_selected_emails_01(self):
+        selected, filename_map = self._select()
+        self.assertEqual(selected, ["1.mbs", "2.mbs", "4.mbs", "6.mbs"])
+        self.assertEqual(
+            filename_map,
+            {
+                "1.mbs": "20140601090000a@b.c+0100.mbs",
+                "2.mbs": "20140602090000d@e.f+0100.mbs",
+                "4.mbs": "20140603090000a@b.c+0100.mbs",
+                "6.mbs": "20140604090000a@b.c-0500.mbs",
+            },
+        )
+        for extra in (
+            ("workers 2",),
+            ("headerindex headers.sqlite",),
+            ("headerindex headers.sqlite",),
+            ("workers 2", "headerindex headers.sqlite"),
+        ):
+            self.assertEqual(self._select(*extra), (selected, filename_map))
+
+    def test_selected_emails_02(self):
+        self.assertEqual(
+            self._select(
+                "workers 2", mp_context=multiprocessing.get_context("spawn")
+            ),
+            self._select(),
+        )
+
+
+class OperaCheckpointCopy(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.ec = emailcollector.EmailCollector(
+            self.directory.name,
+            configuration="\n".join(
+                (
+                    _opera_configuration(self.directory.name),
+                    "checkpoint checkpoint.txt",
+                )
+            ),
+            reporter=reporter.Reporter(),
+        )
+        self.ec.parse()
+        self.copy_file_atomic = emailcollector._copy_file_atomic
+
+    def tearDown(self):
+        emailcollector._copy_file_atomic = self.copy_file_atomic
+        self.directory.cleanup()
+
+    def test_copy_emails_01(self):
+        def copy_file_atomic(source, target):
+            if source.endswith("4.mbs"):
+                raise FileNotFoundError(2, "No such directory", target)
+            self.copy_file_atomic(source, target)
+
+        checkpoint = os.path.join(self.directory.name, "checkpoint.txt")
+        emailcollector._copy_file_atomic = copy_file_atomic
+        self.assertEqual(self.ec.copy_emails(), None)
+        self.assertEqual(os.path.exists(checkpoint), False)
+        emailcollector._copy_file_atomic = self.copy_file_atomic
+        shutil.rmtree(self.ec.outputdirectory)
+        self.assertEqual(self.ec.copy_emails(), 4)
+        self.assertEqual(os.path.exists(checkpoint), True)
+
+
 class EmailCollector_select(unittest.TestCase):
     def setUp(self):
         self.opd = os.path.join("~", "testoperaselect")
@@ -101,10 +716,70 @@ def suite_ec():
     return unittest.TestLoader().loadTestsFromTestCase(EmailCollector)
 
 
+def suite_rmh():
+    return unittest.TestLoader().loadTestsFromTestCase(ReadMessageHeaders)
+
+
+def suite_cfa():
+    return unittest.TestLoader().loadTestsFromTestCase(CopyFileAtomic)
+
+
+def suite_oc():
+    return unittest.TestLoader().loadTestsFromTestCase(OperaCheckpoint)
+
+
+def suite_oa():
+    return unittest.TestLoader().loadTestsFromTestCase(OperaAccounts)
+
+
+def suite_oge():
+    return unittest.TestLoader().loadTestsFromTestCase(OperaGetEmails)
+
+
+def suite_ec_a():
+    return unittest.TestLoader().loadTestsFromTestCase(EmailCollector_async)
+
+
+def suite_ec_i():
+    return unittest.TestLoader().loadTestsFromTestCase(EmailCollector_iter)
+
+
+def suite_ec_e():
+    return unittest.TestLoader().loadTestsFromTestCase(EmailCollector_exclude)
+
+
+def suite_ec_st():
+    return unittest.TestLoader().loadTestsFromTestCase(EmailCollector_stats)
+
+
+def suite_ec_m():
+    return unittest.TestLoader().loadTestsFromTestCase(EmailCollector_maps)
+
+
+def suite_ec_o():
+    return unittest.TestLoader().loadTestsFromTestCase(EmailCollector_opera)
+
+
+def suite_occ():
+    return unittest.TestLoader().loadTestsFromTestCase(OperaCheckpointCopy)
+
+
 def suite_ec_s():
     return unittest.TestLoader().loadTestsFromTestCase(EmailCollector_select)
 
 
 if __name__ == "__main__":
     unittest.TextTestRunner(verbosity=2).run(suite_ec())
+    unittest.TextTestRunner(verbosity=2).run(suite_rmh())
+    unittest.TextTestRunner(verbosity=2).run(suite_cfa())
+    unittest.TextTestRunner(verbosity=2).run(suite_oc())
+    unittest.TextTestRunner(verbosity=2).run(suite_oa())
+    unittest.TextTestRunner(verbosity=2).run(suite_oge())
+    unittest.TextTestRunner(verbosity=2).run(suite_ec_a())
+    unittest.TextTestRunner(verbosity=2).run(suite_ec_i())
+    unittest.TextTestRunner(verbosity=2).run(suite_ec_e())
+    unittest.TextTestRunner(verbosity=2).run(suite_ec_st())
+    unittest.TextTestRunner(verbosity=2).run(suite_ec_m())
+    unittest.TextTestRunner(verbosity=2).run(suite_ec_o())
+    unittest.TextTestRunner(verbosity=2).run(suite_occ())
     unittest.TextTestRunner(verbosity=2).run(suite_ec_s())
@@ -0,0 +1,170 @@
+# test_fastheaders.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""fastheaders tests.
+
+The answers of selection_headers are compared with the answers from the
+email package, as used by emailcollector when selection_headers returns
+None.
+
+"""
+
+import unittest
+import random
+import datetime
+
+from .. import fastheaders
+from .. import emailcollector
+from ...benchmark import corpus
+
+# From header values: the address is expected from selection_headers if
+# the second item is True.
+_FROMS = (
+    ("a@b.c", True),
+    ("Name <a@b.c>", True),
+    ("J. Name <a.b@c-d.e>", True),
+    ('"Name, J" <a+b@c.d>', True),
+    ("=?utf-8?q?J=C3=B6rg?= <x@y.z>", True),
+    ("Name\n <a@b.c>", True),
+    ("Name\r\n\t<a@b.c>", True),
+    ("<a@b.c>", True),
+    ("a@b.c (Name)", False),
+    ("Name <a@b.c> (comment)", False),
+    ("Name <a@[1.2.3.4]>", False),
+    ("Name < a@b.c >", False),
+    ('"a b"@c.d', False),
+    ("a@b.c, d@e.f", False),
+    ("a..b@c.d", False),
+    ("Name", False),
+    ("", False),
+)
+
+# Date header values: the date is expected to be understood by
+# selection_headers if the second item is True.
+_DATES = (
+    ("Mon, 2 Jun 2014 10:11:12 +0100", True),
+    ("Mon, 02 Jun 2014 10:11:12 +0100", True),
+    ("mon,02 JUN 2014 10:11:12 -0130", True),
+    ("2 Jun 2014 10:11 +0000", True),
+    ("Mon, 2 Jun 2014 10:11:12 +0100 (BST)", True),
+    ("Mon, 2 Jun 2014\n 10:11:12 +0100", True),
+    ("Mon, 31 Feb 2014 23:59:59 -1200", True),
+    ("Mon, 2 Jun 2014 10:11:12 -0000", False),
+    ("Mon, 2 Jun 2014 10:11:12 GMT", False),
+    ("Mon 2 Jun 2014 10:11:12 +0100", False),
+    ("Mon, 2 June 2014 10:11:12 +0100", False),
+    ("Mon, 2 Jun 14 10:11:12 +0100", False),
+    ("Mon, 2 Jun 2014 10:11:60 +0100", False),
+    ("2014-06-02T10:11:12+01:00", False),
+    ("", False),
+)
+
+
+def _email_package_headers(header_bytes):
+    """Return selection headers found by the email package."""
+    return emailcollector._get_selection_headers(
+        emailcollector.BytesHeaderParser(
+            _class=emailcollector._MessageFile
+        ).parsebytes(header_bytes)
+    )
+
+
+class SelectionHeaders(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def check(self, header_bytes, fast=True):
+        headers = fastheaders.selection_headers(header_bytes)
+        if fast:
+            self.assertIsNot(headers, None, msg=header_bytes)
+        if headers is not None:
+            self.assertEqual(
+                headers, _email_package_headers(header_bytes), msg=header_bytes
+            )
+
+    def test_selection_headers_01(self):
+        for from_, from_fast in _FROMS:
+            for date_, date_fast in _DATES:
+                self.check(
+                    "".join(
+                        (
+                            "From a@b.c Mon Jun  2 10:11:12 2014\n",
+                            "From: ",
+                            from_,
+                            "\nDate: ",
+                            date_,
+                            "\nMessage-ID: <1@b.c>\n\nBody\n",
+                        )
+                    ).encode(),
+                    fast=from_fast and date_fast,
+                )
+
+    def test_selection_headers_02(self):
+        self.check(
+            b"".join(
+                (
+                    b"Received: from x\r\n\tby y\r\n",
+                    b"FROM: Name <a@b.c>\r\n",
+                    b"from: Other <d@e.f>\r\n",
+                    b"date: Mon, 2 Jun 2014 10:11:12 +0100\r\n",
+                    b"Message-Id:\r\n <1@b.c>\r\n",
+                    b"\r\n",
+                    b"Date: Tue, 3 Jun 2014 10:11:12 +0100\r\n",
+                )
+            )
+        )
+
+    def test_selection_headers_03(self):
+        self.check(b"Subject: x\nFrom: a@b.c\nDate: 2 Jun 2014 10:11 +0100\n")
+        self.check(b"From: a@b.c\n: x\n y\nDate: 2 Jun 2014 10:11 +0100\n")
+        self.check(b"From: a@b.c\nDate: 2 Jun 2014 10:11 +0100\nBad line\n")
+        self.check(
+            b"From: a@b.c\nFrom x\nDate: 2 Jun 2014 10:11 +0100\n", fast=True
+        )
+        self.check(b" x\nFrom: a@b.c\nDate: 2 Jun 2014 10:11 +0100\n")
+        self.check(
+            b"From: a@b.c\nBad line\nDate: 2 Jun 2014 10:11 +0100\n",
+            fast=False,
+        )
+
+    def test_selection_headers_04(self):
+        self.assertEqual(
+            fastheaders.selection_headers(
+                b"From: J\xc3\xb6rg <a@b.c>\nDate: 2 Jun 2014 10:11 +0100\n"
+            ),
+            None,
+        )
+        self.assertEqual(
+            fastheaders.selection_headers(b"From: a@b.c\n\n"), None
+        )
+        self.assertEqual(
+            fastheaders.selection_headers(
+                b"From: Name <a@b.c>\nDate: 2 Jun 2014 10:11 +0100\n"
+            ),
+            (
+                "a@b.c",
+                "2 Jun 2014 10:11 +0100",
+                None,
+                "20140602101100a@b.c+0100.mbs",
+            ),
+        )
+
+    def test_selection_headers_05(self):
+        rng = random.Random(0)
+        senders = ["sender" + str(s) + "@example.com" for s in range(5)]
+        for date_, sender, message in corpus._messages(
+            rng, 200, 7919, senders, 0.5, [b"QUJD"]
+        ):
+            self.check(message)
+
+
+def suite_sh():
+    return unittest.TestLoader().loadTestsFromTestCase(SelectionHeaders)
+
+
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run(suite_sh())
@@ -0,0 +1,101 @@
+# test_headerindex.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""headerindex tests."""
+
+import unittest
+import os
+import tempfile
+
+from .. import headerindex
+
+
+class HeaderIndex(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "headers.sqlite")
+        self.email = os.path.join(self.directory.name, "1.mbs")
+        with open(self.email, "wb") as file_open:
+            file_open.write(b"From: a@b.c\n\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_put_get_01(self):
+        headers = ("a@b.c", "date", "<id>", "name.mbs")
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        self.assertEqual(hi.get(self.email, os.stat(self.email)), None)
+        hi.put(self.email, os.stat(self.email), headers)
+        hi.close()
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        self.assertEqual(hi.get(self.email, os.stat(self.email)), headers)
+        hi.close()
+
+    def test_put_get_02(self):
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        hi.put(self.email, os.stat(self.email), ("a", "b", "c", "d"))
+        with open(self.email, "ab") as file_open:
+            file_open.write(b"body\n")
+        self.assertEqual(hi.get(self.email, os.stat(self.email)), None)
+        hi.close()
+
+    def test_put_get_03(self):
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        hi.put(self.email, os.stat(self.email), ("a\udcff", "b", "c", "d"))
+        self.assertEqual(hi.get(self.email, os.stat(self.email)), None)
+        hi.close()
+
+    def test_put_get_blocks_01(self):
+        blocks = [(0, 10, "20140601", "20140602"), (10, 13, None, None)]
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        self.assertEqual(hi.get_blocks(self.email, os.stat(self.email)), None)
+        hi.put_blocks(self.email, os.stat(self.email), blocks)
+        hi.close()
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        self.assertEqual(
+            hi.get_blocks(self.email, os.stat(self.email)), blocks
+        )
+        hi.put_blocks(self.email, os.stat(self.email), blocks[:1])
+        hi.close()
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        self.assertEqual(
+            hi.get_blocks(self.email, os.stat(self.email)), blocks[:1]
+        )
+        with open(self.email, "ab") as file_open:
+            file_open.write(b"body\n")
+        self.assertEqual(hi.get_blocks(self.email, os.stat(self.email)), None)
+        hi.close()
+
+    def test_put_get_names_01(self):
+        names = ["1.mbs", "2.mbs"]
+        day = os.path.join(self.directory.name, "day")
+        os.mkdir(day)
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        hi.put_names(day, os.stat(day), names)
+        self.assertEqual(hi.get_names(day, os.stat(day)), None)
+        os.utime(day, ns=(10**18, 10**18))
+        hi.put_names(day, os.stat(day), names)
+        hi.close()
+        hi = headerindex.HeaderIndex(self.path)
+        hi.open()
+        self.assertEqual(hi.get_names(day, os.stat(day)), names)
+        os.utime(day, ns=(10**18, 10**18 + 1))
+        self.assertEqual(hi.get_names(day, os.stat(day)), None)
+        hi.close()
+
+
+def suite_hi():
+    return unittest.TestLoader().loadTestsFromTestCase(HeaderIndex)
+
+
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run(suite_hi())
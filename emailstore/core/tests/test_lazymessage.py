@@ -0,0 +1,70 @@
+# test_lazymessage.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""lazymessage tests."""
+
+import unittest
+from email import message_from_bytes
+
+from .. import lazymessage
+
+
+class LazyMessage(unittest.TestCase):
+    def setUp(self):
+        self.loads = []
+        self.cache = lazymessage.MessageCache(maxsize=2)
+
+    def tearDown(self):
+        pass
+
+    def _load(self, key):
+        def load():
+            self.loads.append(key)
+            return message_from_bytes(
+                b"From: a@b.c\nDate: d\nSubject: s\n\nBody\n"
+            )
+
+        return load
+
+    def _lazy(self, key):
+        return lazymessage.LazyMessage(
+            key, self._load(key), self.cache, headers={"date": "d"}
+        )
+
+    def test_get_01(self):
+        message = self._lazy(1)
+        self.assertEqual(message.get("Date"), "d")
+        self.assertEqual(message["date"], "d")
+        self.assertEqual("Date" in message, True)
+        self.assertEqual(self.loads, [])
+        self.assertEqual(message.get("Subject"), "s")
+        self.assertEqual(message.get_payload(), "Body\n")
+        self.assertEqual(self.loads, [1])
+
+    def test_cache_01(self):
+        messages = [self._lazy(k) for k in range(3)]
+        for message in messages:
+            message.as_string()
+        self.assertEqual(self.loads, [0, 1, 2])
+        self.assertEqual(len(self.cache), 2)
+        messages[2].as_string()
+        messages[0].as_string()
+        self.assertEqual(self.loads, [0, 1, 2, 0])
+
+    def test_cache_02(self):
+
+        # Two widgets of three pages of 50 emails in the Select window.
+        self.cache = lazymessage.MessageCache()
+        for _ in range(2):
+            for key in range(2 * 3 * 50):
+                self._lazy(key).get("Subject")
+        self.assertEqual(self.loads, list(range(2 * 3 * 50)))
+
+
+def suite_lm():
+    return unittest.TestLoader().loadTestsFromTestCase(LazyMessage)
+
+
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run(suite_lm())
@@ -0,0 +1,109 @@
+# test_manifest.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""manifest tests."""
+
+import unittest
+import os
+import tempfile
+
+from .. import manifest
+
+
+class Manifest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "source.mbs")
+        self.collected = os.path.join(self.directory.name, "collected")
+        os.mkdir(self.collected)
+        for path in self.source, os.path.join(self.collected, "a.mbs"):
+            with open(path, "wb") as file_open:
+                file_open.write(b"From: a@b.c\n\nBody\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_is_same_01(self):
+        mf = manifest.Manifest(self.collected)
+        stat_result = os.stat(self.source)
+        self.assertEqual(mf.is_same("a.mbs", self.source, stat_result), True)
+        mf.save()
+        self.assertEqual(
+            os.path.exists(os.path.join(self.collected, manifest.MANIFEST)),
+            True,
+        )
+        mf = manifest.Manifest(self.collected)
+        self.assertEqual(mf.is_same("a.mbs", self.source, stat_result), True)
+        self.assertEqual(mf._changed, False)
+
+    def test_is_same_02(self):
+        mf = manifest.Manifest(self.collected)
+        with open(self.source, "wb") as file_open:
+            file_open.write(b"From: a@b.c\n\nBodx\n")
+        self.assertEqual(
+            mf.is_same("a.mbs", self.source, os.stat(self.source)), False
+        )
+
+    def test_is_same_03(self):
+        mf = manifest.Manifest(self.collected)
+        self.assertEqual(
+            mf.is_same(
+                "a.mbs",
+                "mbox[0:20]",
+                os.stat(self.source),
+                source_data=lambda: b"From: a@b.c\n\nBody\n",
+            ),
+            True,
+        )
+        self.assertEqual(
+            mf.is_same(
+                "a.mbs",
+                "mbox[0:20]",
+                os.stat(self.source),
+                source_data=lambda: b"",
+            ),
+            True,
+        )
+
+    def test_is_same_04(self):
+        mf = manifest.Manifest(self.collected)
+        self.assertEqual(
+            mf.is_same(
+                "a.mbs",
+                "mbox[0:20]",
+                os.stat(self.source),
+                source_data=lambda: b"From: a@b.c\n\nBody",
+                fallback_data=lambda: b"From: a@b.c\n\nBody\n",
+            ),
+            True,
+        )
+        self.assertEqual(
+            mf.is_same(
+                "a.mbs",
+                "mbox[0:20]",
+                os.stat(self.source),
+                source_data=lambda: b"",
+            ),
+            True,
+        )
+
+    def test_record_01(self):
+        mf = manifest.Manifest(self.collected)
+        mf.record(
+            "a.mbs",
+            self.source,
+            os.stat(self.source),
+            manifest.file_digest(self.source),
+        )
+        self.assertEqual(
+            mf.is_same("a.mbs", self.source, os.stat(self.source)), True
+        )
+
+
+def suite_mf():
+    return unittest.TestLoader().loadTestsFromTestCase(Manifest)
+
+
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run(suite_mf())
@@ -0,0 +1,156 @@
+# test_mboxindex.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""mboxindex tests."""
+
+import unittest
+import os
+import tempfile
+import mailbox
+
+from .. import mboxindex
+
+_MBOX = b"".join(
+    (
+        b"From a@b.c Mon Jun  2 10:11:12 2014\n",
+        b"From: a@b.c\n",
+        b"Subject: one\n",
+        b"\n",
+        b"Body one\n",
+        b">From quoted line\n",
+        b"\n",
+        b"From d@e.f Mon Jun  2 10:11:13 2014\n",
+        b"From: d@e.f\n",
+        b"\n",
+        b"Body two without blank line after\n",
+        b"From g@h.i Mon Jun  2 10:11:14 2014\n",
+        b"From: g@h.i\n",
+        b"\n",
+        b"Body three\n",
+        b"\n",
+    )
+)
+
+
+def _header_parser(header_bytes):
+    return (bytes(header_bytes), None, None, None)
+
+
+class ScanMbox(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "test.mbox")
+        with open(self.path, "wb") as file_open:
+            file_open.write(_MBOX)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_scan_mbox_01(self):
+        entries = mboxindex.scan_mbox(self.path, _header_parser)
+        mbox = mailbox.mbox(self.path, create=False)
+        self.assertEqual(len(entries), len(mbox))
+        for entry, key in zip(entries, mbox.iterkeys()):
+            self.assertEqual(entry.read()[-1], mbox.get_bytes(key))
+            self.assertEqual(
+                entry.get_message(mailbox.mboxMessage).get_from(),
+                mbox.get_message(key).get_from(),
+            )
+        mbox.close()
+        self.assertEqual(entries[0].sender, b"From: a@b.c\nSubject: one\n\n")
+
+    def test_scan_mbox_mmap_01(self):
+        mboxmap = mboxindex.MboxMap(self.path)
+        entries = mboxindex.scan_mbox_mmap(mboxmap, _header_parser)
+        expected = mboxindex.scan_mbox(self.path, _header_parser)
+        self.assertEqual(
+            [(e.start, e.stop, e.sender) for e in entries],
+            [(e.start, e.stop, e.sender) for e in expected],
+        )
+        for entry in entries:
+            self.assertEqual(entry.read(mboxmap), entry.read())
+        mboxmap.close()
+
+    def test_scan_mbox_mmap_02(self):
+        for data in (b"", b"Preamble\n", b"From x\n\n\n", b"From x"):
+            with open(self.path, "wb") as file_open:
+                file_open.write(data)
+            mboxmap = mboxindex.MboxMap(self.path)
+            entries = mboxindex.scan_mbox_mmap(mboxmap, _header_parser)
+            expected = mboxindex.scan_mbox(self.path, _header_parser)
+            self.assertEqual(
+                [(e.start, e.stop, e.sender) for e in entries],
+                [(e.start, e.stop, e.sender) for e in expected],
+            )
+            mboxmap.close()
+
+    def test_scan_mbox_range_01(self):
+        expected = mboxindex.scan_mbox(self.path, _header_parser)
+        begin = expected[1].start
+        end = expected[2].start
+        mboxmap = mboxindex.MboxMap(self.path)
+        for entries in (
+            mboxindex.scan_mbox(self.path, _header_parser, begin, end),
+            mboxindex.scan_mbox_mmap(mboxmap, _header_parser, begin, end),
+        ):
+            self.assertEqual(
+                [(e.start, e.stop, e.sender) for e in entries],
+                [(e.start, e.stop, e.sender) for e in expected[1:2]],
+            )
+        for entries in (
+            mboxindex.scan_mbox(self.path, _header_parser, begin),
+            mboxindex.scan_mbox_mmap(mboxmap, _header_parser, begin),
+        ):
+            self.assertEqual(
+                [(e.start, e.stop, e.sender) for e in entries],
+                [(e.start, e.stop, e.sender) for e in expected[1:]],
+            )
+        mboxmap.close()
+
+    def test_date_blocks_01(self):
+        entries = mboxindex.scan_mbox(self.path, _header_parser)
+        for entry, filename in zip(entries, ("20140601a", None, "20140603a")):
+            entry.filename = filename
+        blocks = mboxindex.date_blocks(entries, len(_MBOX), block_size=2)
+        self.assertEqual(
+            blocks,
+            [
+                (entries[0].start, entries[2].start, "20140601", "20140601"),
+                (entries[2].start, len(_MBOX), "20140603", "20140603"),
+            ],
+        )
+        self.assertEqual(
+            mboxindex.block_ranges(blocks),
+            [(entries[0].start, len(_MBOX))],
+        )
+        self.assertEqual(
+            mboxindex.block_ranges(blocks, earliest="20140602"),
+            [(entries[2].start, len(_MBOX))],
+        )
+        self.assertEqual(
+            mboxindex.block_ranges(blocks, latest="20140601"),
+            [(entries[0].start, entries[2].start)],
+        )
+        self.assertEqual(
+            mboxindex.block_ranges(blocks, "20140604", "20140610"), []
+        )
+        self.assertEqual(
+            mboxindex.block_ranges([(0, 10, None, None)], "20140601"), []
+        )
+
+    def test_scan_mbox_02(self):
+        self.assertRaises(
+            FileNotFoundError,
+            mboxindex.scan_mbox,
+            os.path.join(self.directory.name, "missing.mbox"),
+            _header_parser,
+        )
+
+
+def suite_sm():
+    return unittest.TestLoader().loadTestsFromTestCase(ScanMbox)
+
+
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run(suite_sm())
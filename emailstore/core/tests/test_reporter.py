@@ -0,0 +1,39 @@
+# test_reporter.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""reporter tests."""
+
+import unittest
+
+from .. import reporter
+
+
+class Reporter(unittest.TestCase):
+    def test_information_01(self):
+        self.assertEqual(reporter.Reporter().information("t", "m"), None)
+        self.assertEqual(reporter.Reporter().progress("copy", copied=1), None)
+
+    def test_information_02(self):
+        with self.assertLogs(reporter.logger, level="WARNING") as logs:
+            reporter.LoggingReporter().information("Title", "\n\nA\n\nB.")
+        self.assertEqual(
+            logs.output, ["WARNING:%s:Title: A B." % reporter.__name__]
+        )
+
+    def test_information_03(self):
+        self.assertRaisesRegex(
+            reporter.ReporterError,
+            "^Title: A B.$",
+            reporter.RaisingReporter().information,
+            "Title",
+            "\n\nA\n\nB.",
+        )
+
+
+def suite_r():
+    return unittest.TestLoader().loadTestsFromTestCase(Reporter)
+
+
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run(suite_r())
@@ -0,0 +1,75 @@
+# test_stats.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""stats tests."""
+
+import unittest
+import os
+import json
+import tempfile
+
+from .. import stats
+
+
+class CollectorStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = stats.CollectorStats()
+
+    def tearDown(self):
+        pass
+
+    def test_count_01(self):
+        self.stats.count("files_listed")
+        self.stats.count("files_listed", 4)
+        self.assertEqual(self.stats.counters, {"files_listed": 5})
+
+    def test_timer_01(self):
+        with self.stats.timer("copy"):
+            pass
+        with self.stats.timer("copy"):
+            pass
+        self.assertEqual(self.stats.calls, {"copy": 2})
+        self.assertGreaterEqual(self.stats.seconds["copy"], 0)
+
+    def test_timer_02(self):
+        def fail():
+            with self.stats.timer("copy"):
+                raise KeyError
+
+        self.assertRaises(KeyError, fail)
+        self.assertEqual(self.stats.calls, {"copy": 1})
+
+    def test_write_json_01(self):
+        self.stats.count("bytes_written", 10)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.json")
+            self.stats.write_json(path)
+            with open(path, encoding="utf8") as file_open:
+                self.assertEqual(
+                    json.load(file_open),
+                    {
+                        "counters": {"bytes_written": 10},
+                        "seconds": {},
+                        "calls": {},
+                    },
+                )
+        self.stats.clear()
+        self.assertEqual(self.stats.counters, {})
+
+    def test_null_stats_01(self):
+        null = stats.NullStats()
+        null.count("files_listed")
+        with null.timer("copy"):
+            pass
+        self.assertEqual(
+            null.as_dict(), {"counters": {}, "seconds": {}, "calls": {}}
+        )
+
+
+def suite_cs():
+    return unittest.TestLoader().loadTestsFromTestCase(CollectorStats)
+
+
+if __name__ == "__main__":
+    unittest.TextTestRunner(verbosity=2).run(suite_cs())
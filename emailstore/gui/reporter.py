@@ -0,0 +1,84 @@
+# reporter.py
+# Copyright 2014 Roger Marsh
+# Licence: See LICENCE (BSD licence)
+
+"""Tell the user about problems found while collecting emails in dialogues.
+
+Progress is shown in the status bar if there is one.
+
+"""
+
+import threading
+import tkinter.messagebox
+
+from ..core.reporter import Reporter
+
+
+class TkReporter(Reporter):
+    """Show problems in tkinter dialogues and progress in a status bar."""
+
+    def __init__(self, parent=None, statusbar=None):
+        """Note parent widget for dialogues and status bar for progress.
+
+        statusbar - object with a set_status_text(text) method or None
+
+        """
+        self.parent = parent
+        self.statusbar = statusbar
+
+    def information(self, title, message):
+        """Show problem in an information dialogue."""
+        tkinter.messagebox.showinfo(
+            parent=self.parent, title=title, message=message
+        )
+
+    def progress(self, stage, **counts):
+        """Show progress in status bar."""
+        if self.statusbar is None:
+            return
+        self.statusbar.set_status_text(
+            "".join(
+                (
+                    stage.capitalize(),
+                    ": ",
+                    ", ".join(
+                        " ".join((str(v), k)) for k, v in counts.items()
+                    ),
+                )
+            )
+        )
+
+
+class QueuedReporter(Reporter):
+    """Pass reports from a worker thread to a Reporter in the main thread.
+
+    Each report is put on a queue as a (function, args) tuple which the
+    main thread takes from the queue and calls.  Reports made in the thread
+    which created the QueuedReporter, such as while copying emails, are
+    passed to the reporter directly.
+
+    """
+
+    def __init__(self, reporter, queue):
+        """Note reporter used by main thread and queue to pass reports."""
+        self.reporter = reporter
+        self.queue = queue
+        self._thread = threading.get_ident()
+
+    def information(self, title, message):
+        """Pass problem to reporter."""
+        if threading.get_ident() == self._thread:
+            self.reporter.information(title, message)
+            return
+        self.queue.put((self.reporter.information, (title, message)))
+
+    def progress(self, stage, **counts):
+        """Pass progress to reporter."""
+        if threading.get_ident() == self._thread:
+            self.reporter.progress(stage, **counts)
+            return
+        self.queue.put((self._progress, (stage, counts)))
+
+    def _progress(self, stage, counts):
+        """Report progress with counts in main thread."""
+        self.reporter.progress(stage, **counts)
@@ -5,11 +5,14 @@
 """Email selection filter User Interface."""
 
 import os
+import bisect
+import queue
+import multiprocessing
+import threading
+import time
 import tkinter
 import tkinter.messagebox
 import tkinter.filedialog
-from email.utils import parseaddr, parsedate_tz
-from time import strftime
 
 from solentware_bind.gui.bindings import Bindings
 
@@ -17,9 +20,12 @@ from solentware_misc.gui import textreadonly
 from solentware_misc.gui.configuredialog import ConfigureDialog
 
 from . import help_
+from .reporter import TkReporter, QueuedReporter
 from .. import APPLICATION_NAME
 from ..core.emailcollector import (
     EmailCollector,
+    EmailCollectorError,
+    EmailCollectorCancelled,
     EXCLUDE_EMAIL,
     COLLECTED_CONF,
     _MBOX_MAIL_STORE,
@@ -29,6 +35,23 @@ from ..core.emailcollector import (
 STARTUP_MINIMUM_WIDTH = 340
 STARTUP_MINIMUM_HEIGHT = 400
 
+# The number of emails in a page of the email list and email text widgets.
+# At most three pages, the page being viewed and the pages either side, are
+# put in the widgets at a time.  The emails in both widgets must fit in the
+# collector's MessageCache, see lazymessage.MESSAGE_CACHE_SIZE.
+PAGE_SIZE = 50
+
+# Tag for exclude lines in the configuration widget.
+EXCLUDE_TAG = "exclude"
+
+# Milliseconds between looks at the queue of emails found by a selection
+# being done in a worker thread.
+POLL_INTERVAL = 100
+
+# Maximum seconds between passing emails found by a selection to the
+# main thread, unless a page of emails has been found sooner.
+ROWS_INTERVAL = 0.25
+
 
 class SelectError(Exception):
     """Exception class for Select."""
@@ -67,8 +90,10 @@ class Select(Bindings):
             self._configuration = None
             self._configuration_edited = False
             self._email_collector = None
-            self._tag_names = set()
             self._excluded = set()
+            self._exclude_lines = {}
+            self._selection_queue = None
+            self._after_selection = None
 
             menubar = tkinter.Menu(self.root)
 
@@ -124,6 +149,11 @@ class Select(Bindings):
                 underline=0,
                 command=self.try_command(self.clear_selection, menuactions),
             )
+            menuactions.add_command(
+                label="Cancel selection",
+                underline=1,
+                command=self.try_command(self.cancel_selection, menuactions),
+            )
             menufile.add_separator()
             menuactions.add_command(
                 label="Option editor",
@@ -186,6 +216,15 @@ class Select(Bindings):
             self.emailtextctrl = textreadonly.make_text_readonly(
                 master=emailpane
             )
+            self.emaillistrows = EmailRows(
+                self.emaillistctrl, _insert_email_summary
+            )
+            self.emailtextrows = EmailRows(
+                self.emailtextctrl, _insert_email_text
+            )
+            self.configctrl.tag_bind(
+                EXCLUDE_TAG, "<ButtonPress-1>", self._file_exists
+            )
             originalpane.add(self.configctrl)
             originalpane.add(self.emaillistctrl)
             emailpane.add(self.emailtextctrl)
@@ -342,10 +381,9 @@ class Select(Bindings):
             message="Confirm Close.",
         )
         if dlg == tkinter.messagebox.YES:
-            self._clear_email_tags()
+            self._stop_selection()
+            self._clear_email_rows()
             self.configctrl.delete("1.0", tkinter.END)
-            self.emailtextctrl.delete("1.0", tkinter.END)
-            self.emaillistctrl.delete("1.0", tkinter.END)
             self.statusbar.set_status_text()
             self._configuration = None
             self._configuration_edited = False
@@ -422,17 +460,23 @@ class Select(Bindings):
         self.configctrl.insert(tkinter.END, config_text)
         with open(self._configuration, "w", encoding="utf8") as ocf:
             ocf.write(config_text)
-            self._clear_email_tags()
-            self.emailtextctrl.delete("1.0", tkinter.END)
-            self.emaillistctrl.delete("1.0", tkinter.END)
+            self._stop_selection()
+            self._clear_email_rows()
             self.statusbar.set_status_text()
             self._configuration_edited = False
             self._email_collector = None
         if self._most_recent_action:
             self._most_recent_action()
 
-    def show_selection(self):
-        """Do the email selection but do not copy the emails."""
+    def show_selection(self, then=None):
+        """Do the email selection but do not copy the emails.
+
+        then - function called when the selection is done, or None
+
+        The selection is done in a worker thread, and emails are shown as
+        they are found, unless the selection has been done already.
+
+        """
         if self._configuration is None:
             tkinter.messagebox.showinfo(
                 parent=self.get_toplevel(),
@@ -452,7 +496,11 @@ class Select(Bindings):
                 ),
             )
             return None
+        if self._selection_running("Show Email Selection"):
+            return None
+        self._most_recent_action = self.show_selection
         if self._email_collector is None:
+            ui_queue = queue.Queue()
             emc = EmailCollector(
                 os.path.dirname(self._configuration),
                 configuration=self.configctrl.get(
@@ -460,6 +508,13 @@ class Select(Bindings):
                 ),
                 dryrun=True,
                 parent=self.get_toplevel(),
+                reporter=QueuedReporter(
+                    TkReporter(
+                        parent=self.get_toplevel(), statusbar=self.statusbar
+                    ),
+                    ui_queue,
+                ),
+                mp_context=multiprocessing.get_context("spawn"),
             )
             if not emc.parse():
                 tkinter.messagebox.showinfo(
@@ -468,115 +523,233 @@ class Select(Bindings):
                     message="Email selection rules are invalid",
                 )
                 return None
-            if not emc.selected_emails:
-                tkinter.messagebox.showinfo(
-                    parent=self.get_toplevel(),
-                    title="Show Email Selection",
-                    message="No emails match the selection rules.",
-                )
-                return None
             self._email_collector = emc
+            self._start_selection(ui_queue, then)
+            return True
         self._show_selection()
-        self._most_recent_action = self.show_selection
+        if then is not None:
+            then()
         return True
 
-    def _show_selection(self):
-        """Do the email selection but do not copy the emails."""
-        self._clear_email_tags()
-        emailtextctrl = self.emailtextctrl
-        emaillistctrl = self.emaillistctrl
-        configctrl = self.configctrl
-        tags = self._tag_names
-        emailtextctrl.delete("1.0", tkinter.END)
-        emaillistctrl.delete("1.0", tkinter.END)
+    def _start_selection(self, ui_queue, then):
+        """Start selection in a worker thread and show emails as found.
 
-        # Tag the text put in the widgets such that the source entry in
-        # selected_emails_text can be recovered from the pointer position
-        # over the widget.
-        try:
-            for email_num, email_item in enumerate(
-                self._email_collector.selected_emails_text
-            ):
-                textname = "x".join(("T", str(email_num)))
-                tags.add(textname)
-                entryname = "x".join(("M", str(email_num)))
-                tags.add(entryname)
-                fromname = "x".join(("F", str(email_num)))
-                tags.add(fromname)
-                start = emailtextctrl.index(tkinter.INSERT)
-                emailtextctrl.insert(tkinter.END, email_item.as_string())
-                emailtextctrl.insert(tkinter.END, "\n")
-                emailtextctrl.tag_add(
-                    textname, start, emailtextctrl.index(tkinter.INSERT)
-                )
-                emailtextctrl.insert(tkinter.END, "\n\n\n")
-                emailtextctrl.tag_add(
-                    entryname, start, emailtextctrl.index(tkinter.INSERT)
-                )
-                start = emaillistctrl.index(tkinter.INSERT)
-                fromstart = emaillistctrl.index(tkinter.INSERT)
-                emaillistctrl.insert(tkinter.END, email_item.get("From", ""))
-                emaillistctrl.insert(tkinter.END, "\n")
-                emaillistctrl.insert(tkinter.END, email_item.get("Date", ""))
-                emaillistctrl.tag_add(
-                    fromname, fromstart, emaillistctrl.index(tkinter.INSERT)
-                )
-                emaillistctrl.insert(tkinter.END, "\n")
-                emaillistctrl.insert(
-                    tkinter.END, email_item.get("Subject", "")
-                )
-                emaillistctrl.insert(tkinter.END, "\n")
-                emaillistctrl.tag_add(
-                    textname, start, emaillistctrl.index(tkinter.INSERT)
-                )
-                emaillistctrl.insert(tkinter.END, "\n\n")
-                emaillistctrl.tag_add(
-                    entryname, start, emaillistctrl.index(tkinter.INSERT)
+        ui_queue - queue of (function, args) to be called in main thread
+        then - function called when the selection is done, or None
+
+        """
+        self._clear_email_rows()
+        self.emaillistrows.set_rows([])
+        self.emailtextrows.set_rows([])
+        self.statusbar.set_status_text("Selecting emails")
+        self._selection_queue = ui_queue
+        self._after_selection = then
+        threading.Thread(
+            target=_select_emails,
+            args=(
+                self._email_collector,
+                ui_queue,
+                self._add_rows,
+                self._selection_done,
+            ),
+            daemon=True,
+        ).start()
+        self.root.after(
+            POLL_INTERVAL,
+            self.try_command(self._poll_selection, self.root),
+            ui_queue,
+        )
+
+    def _poll_selection(self, ui_queue):
+        """Call functions put on ui_queue by the selection worker thread."""
+        while ui_queue is self._selection_queue:
+            try:
+                function, args = ui_queue.get_nowait()
+            except queue.Empty:
+                self.root.after(
+                    POLL_INTERVAL,
+                    self.try_command(self._poll_selection, self.root),
+                    ui_queue,
                 )
-                from_ = emaillistctrl.get(
-                    *emaillistctrl.tag_ranges(fromname)
-                ).split("\n")
-                from_time = parsedate_tz(from_[1])
-                from_addr = parseaddr(from_[0])
-                date = strftime("%Y%m%d%H%M%S", from_time[:-1])
-                utc = "".join((format(from_time[-1] // 3600, "0=+3"), "00"))
-                filename = "".join((date, from_addr[-1], utc, ".mbs"))
-                if filename in self._email_collector.excluded_emails:
-                    filename_index = configctrl.search(filename, "1.0")
-                    start = configctrl.index(
-                        " ".join((filename_index, "linestart"))
-                    )
-                    end = configctrl.index(
-                        " ".join((filename_index, "lineend"))
-                    )
-                    configctrl.tag_add(fromname, start, end)
-                    configctrl.tag_bind(
-                        fromname, "<ButtonPress-1>", self._file_exists
-                    )
-        except TypeError:
-            if not self._email_collector.selected_emails_text:
+                return
+            function(*args)
+
+    def _add_rows(self, rows):
+        """Show rows, a list of emails, found by selection."""
+        with self._email_collector.stats.timer("show"):
+            self.emaillistrows.extend(rows)
+            self.emailtextrows.extend(rows)
+
+    def _selection_done(self, exception):
+        """Tidy up after the selection worker thread has finished.
+
+        exception - the exception which stopped the selection or None
+
+        """
+        self._selection_queue = None
+        then = self._after_selection
+        self._after_selection = None
+        if isinstance(exception, EmailCollectorCancelled):
+            self._email_collector = None
+            self.statusbar.set_status_text("Selection cancelled")
+            return
+        if exception is not None:
+            self._email_collector = None
+            self.statusbar.set_status_text()
+            if isinstance(exception, EmailCollectorError):
                 tkinter.messagebox.showinfo(
                     parent=self.get_toplevel(),
-                    title="Email Selection",
-                    message="".join(
-                        (
-                            "No emails found.\n\n",
-                            "(Email addresses spelt correctly?)",
-                        )
-                    ),
+                    title="Show Email Selection",
+                    message=str(exception),
                 )
                 return
-            raise
+            raise exception
+
+        # A cancel made after the selection's last look at the cancel event
+        # must not cancel the next copy.
+        self._email_collector.clear_cancel()
+        count = len(self.emaillistrows.rows)
+        if not count:
+            self._email_collector = None
+            self.statusbar.set_status_text()
+            tkinter.messagebox.showinfo(
+                parent=self.get_toplevel(),
+                title="Show Email Selection",
+                message="No emails match the selection rules.",
+            )
+            return
+        self.statusbar.set_status_text(
+            " ".join(
+                (
+                    str(count),
+                    "email selected" if count == 1 else "emails selected",
+                )
+            )
+        )
+        self._tag_exclude_lines()
+        if then is not None:
+            then()
+
+    def _selection_running(self, title):
+        """Return True, after telling user, if a selection is being done."""
+        if self._selection_queue is None:
+            return False
+        tkinter.messagebox.showinfo(
+            parent=self.get_toplevel(),
+            title=title,
+            message="".join(
+                (
+                    "Emails are being selected.\n\nWait for the selection ",
+                    "to finish, or cancel it, first.",
+                )
+            ),
+        )
+        return True
+
+    def _stop_selection(self):
+        """Cancel the selection being done, if any, and ignore it's emails."""
+        if self._selection_queue is None:
+            return
+        self._email_collector.cancel()
+        self._selection_queue = None
+        self._after_selection = None
+
+    def cancel_selection(self):
+        """Cancel the selection being done."""
+        if self._selection_queue is None:
+            tkinter.messagebox.showinfo(
+                parent=self.get_toplevel(),
+                title="Cancel Email Selection",
+                message="No emails are being selected.",
+            )
+            return
+        self._email_collector.cancel()
+        self.statusbar.set_status_text("Cancelling selection")
+
+    def _show_selection(self):
+        """Do the email selection but do not copy the emails."""
+        self._clear_email_rows()
+        emails = self._email_collector.selected_emails_text
+        if not emails:
+            tkinter.messagebox.showinfo(
+                parent=self.get_toplevel(),
+                title="Email Selection",
+                message="".join(
+                    (
+                        "No emails found.\n\n",
+                        "(Email addresses spelt correctly?)",
+                    )
+                ),
+            )
+            return
+
+        # The widgets show a few pages of emails near the emails being
+        # viewed, and the email for a position in a widget is found from
+        # the row index kept for each widget.
+        with self._email_collector.stats.timer("show"):
+            self.emaillistrows.set_rows(emails)
+            self.emailtextrows.set_rows(emails)
+            self._tag_exclude_lines()
+
+    def _tag_exclude_lines(self):
+        """Tag exclude lines in configuration widget and index them.
+
+        The line number of each exclude line is kept in a dict keyed by the
+        excluded filename.
+
+        """
+        configctrl = self.configctrl
+        configctrl.tag_remove(EXCLUDE_TAG, "1.0", tkinter.END)
+        exclude_lines = {}
+        for number, line in enumerate(
+            configctrl.get("1.0", tkinter.END).splitlines(), start=1
+        ):
+            filename = _exclude_line_filename(line)
+            if filename is None:
+                continue
+            exclude_lines[filename] = number
+            configctrl.tag_add(
+                EXCLUDE_TAG,
+                "".join((str(number), ".0")),
+                "".join((str(number), ".end")),
+            )
+        self._exclude_lines = exclude_lines
+
+    def _exclude_line_index(self, filename):
+        """Return index of exclude line for filename or None."""
+        number = self._exclude_lines.get(filename)
+        if number is None:
+            return None
+        start = "".join((str(number), ".0"))
+        configctrl = self.configctrl
+
+        # The configuration may have been edited since the lines were indexed.
+        if (
+            _exclude_line_filename(
+                configctrl.get(start, "".join((str(number), ".end")))
+            )
+            != filename
+        ):
+            self._tag_exclude_lines()
+            number = self._exclude_lines.get(filename)
+            if number is None:
+                return None
+            start = "".join((str(number), ".0"))
+        return start
 
     def apply_selection(self):
         """Do the email selection and copy the emails on confirmation."""
-        if not self.show_selection():
+        if self._selection_running("Apply Email Selection"):
+            return
+        if not self.show_selection(then=self._apply_selection):
             tkinter.messagebox.showinfo(
                 parent=self.get_toplevel(),
                 title="Apply Email Selection",
                 message="Unable to apply selection",
             )
-            return
+
+    def _apply_selection(self):
+        """Copy the selected emails on confirmation."""
         if (
             tkinter.messagebox.askquestion(
                 parent=self.get_toplevel(),
@@ -617,23 +790,18 @@ class Select(Bindings):
             != tkinter.messagebox.YES
         ):
             return
-        self._clear_email_tags()
-        self.emailtextctrl.delete("1.0", tkinter.END)
-        self.emaillistctrl.delete("1.0", tkinter.END)
+        self._stop_selection()
+        self._clear_email_rows()
         self.statusbar.set_status_text()
         self._email_collector = None
         self._most_recent_action = None
 
-    def _clear_email_tags(self):
-        """Clear the tags identifying data for each email."""
-        for widget in (
-            self.emailtextctrl,
-            self.emaillistctrl,
-            self.configctrl,
-        ):
-            for tag in self._tag_names:
-                widget.tag_delete(tag)
-        self._tag_names.clear()
+    def _clear_email_rows(self):
+        """Clear the email list and email text widgets."""
+        self.emaillistrows.clear()
+        self.emailtextrows.clear()
+        self.configctrl.tag_remove(EXCLUDE_TAG, "1.0", tkinter.END)
+        self._exclude_lines = {}
 
     def conf_popup(self, event=None):
         """Present dialogues to cancel exclusions and edit mbox file list."""
@@ -642,16 +810,16 @@ class Select(Bindings):
         start = wconf.index(" ".join((index, "linestart")))
         end = wconf.index(" ".join((index, "lineend", "+1 char")))
         text = wconf.get(start, end)
+        filename = _exclude_line_filename(text)
         keyvalue = text.split(" ", maxsplit=1)
-        if len(keyvalue) == 1:
+        if filename is None and len(keyvalue) == 1:
             tkinter.messagebox.showinfo(
                 parent=self.get_toplevel(),
                 title="Edit Email Selection",
                 message="Popup menu not supported for 'key only' lines",
             )
             return
-        if keyvalue[0] not in (
-            EXCLUDE_EMAIL,
+        if filename is None and keyvalue[0] not in (
             _MBOX_MAIL_STORE,
             _MAILBOX_STYLE,
         ):
@@ -667,7 +835,9 @@ class Select(Bindings):
                 ),
             )
             return
-        if keyvalue[0] == EXCLUDE_EMAIL:
+        if filename is not None:
+            if self._selection_running("Cancel Exclude Email"):
+                return
             if (
                 tkinter.messagebox.askquestion(
                     parent=self.get_toplevel(),
@@ -675,7 +845,7 @@ class Select(Bindings):
                     message="".join(
                         (
                             "Confirm request to cancel exclusion of \n\n",
-                            text.split(" ", 1)[-1],
+                            filename,
                             "\n\nemail.\n\nThe file is not copied to the ",
                             "output directory in this action; use ",
                             '"Apply" later to do this.',
@@ -686,11 +856,18 @@ class Select(Bindings):
             ):
                 return
             wconf.delete(start, end)
-            if self._email_collector is not None:
-                self._email_collector.include_email(
-                    text.split(" ", 1)[-1].strip()
-                )
-            self._save_configuration()
+            if self._email_collector is None:
+                self._save_configuration()
+                return
+
+            # The selection does not depend on the exclusions, so the emails
+            # shown are still correct and only the exclusions need change.
+            self._email_collector.include_email(filename)
+            self._tag_exclude_lines()
+            self._write_configuration()
+            self.statusbar.set_status_text(
+                " ".join((filename, "no longer excluded"))
+            )
             return
         if keyvalue[0] == _MBOX_MAIL_STORE:
             mboxpath = os.path.expanduser(keyvalue[1])
@@ -816,128 +993,135 @@ class Select(Bindings):
 
     def list_popup(self, event=None):
         """Present dialogue to scroll text widget to selected email."""
-        wtext = self.emailtextctrl
-        wlist = self.emaillistctrl
         wconf = self.configctrl
-        tags = wlist.tag_names(
-            wlist.index("".join(("@", str(event.x), ",", str(event.y))))
+        row = self.emaillistrows.row_at(
+            "".join(("@", str(event.x), ",", str(event.y)))
         )
-        for tag in tags:
-            if tag.startswith("F"):
-                text = wlist.get(*wlist.tag_ranges(tag))
-                if (
-                    tkinter.messagebox.askquestion(
-                        parent=self.get_toplevel(),
-                        title="Show Email in List",
-                        message="".join(
-                            (
-                                "Confirm request to scroll text to \n\n",
-                                text,
-                                "\n\nemail.",
-                            )
-                        ),
+        if row is None:
+            return
+        email_item = self.emaillistrows.rows[row]
+        if (
+            tkinter.messagebox.askquestion(
+                parent=self.get_toplevel(),
+                title="Show Email in List",
+                message="".join(
+                    (
+                        "Confirm request to scroll text to \n\n",
+                        _email_from_date(email_item),
+                        "\n\nemail.",
                     )
-                    != tkinter.messagebox.YES
-                ):
-                    return
-                wtext.see(wtext.tag_ranges("".join(("T", tag[1:])))[0])
-                trconf = wconf.tag_ranges(tag)
-                if trconf:
-                    wconf.see(trconf[-1])
-                return
+                ),
+            )
+            != tkinter.messagebox.YES
+        ):
+            return
+        self.emailtextrows.see(row)
+        filename = self._email_collector.message_filename(email_item)
+        if filename is not None:
+            index = self._exclude_line_index(filename)
+            if index is not None:
+                wconf.see(index)
 
     def text_popup(self, event=None):
         """Present dialogue to exclude emails from selection."""
-        wtext = self.emailtextctrl
-        wlist = self.emaillistctrl
-        tags = wtext.tag_names(
-            wtext.index("".join(("@", str(event.x), ",", str(event.y))))
+        row = self.emailtextrows.row_at(
+            "".join(("@", str(event.x), ",", str(event.y)))
         )
-        for tag in tags:
-            if tag.startswith("T"):
-                ftag = "".join(("F", tag[1:]))
-                from_ = wlist.get(*wlist.tag_ranges(ftag)).split("\n")
-                from_time = parsedate_tz(from_[1])
-                from_addr = parseaddr(from_[0])
-                if not (from_addr and from_time):
-                    tkinter.messagebox.showinfo(
-                        parent=self.get_toplevel(),
-                        title="Remove Email from Selection",
-                        message="Email from or date invalid.",
-                    )
-                    return
-                date = strftime("%Y%m%d%H%M%S", from_time[:-1])
-                utc = "".join((format(from_time[-1] // 3600, "0=+3"), "00"))
-                filename = "".join((date, from_addr[-1], utc, ".mbs"))
-                if filename in self._email_collector.excluded_emails:
-                    tkinter.messagebox.showinfo(
-                        parent=self.get_toplevel(),
-                        title="Remove Email from Selection",
-                        message="".join(
-                            (
-                                filename,
-                                "\n\n",
-                                "is already one of the emails excluded from ",
-                                "the selection.",
-                            )
-                        ),
+        if row is None:
+            return
+        if self._selection_running("Remove Email from Selection"):
+            return
+        email_item = self.emailtextrows.rows[row]
+        filename = self._email_collector.message_filename(email_item)
+        if filename is None:
+            tkinter.messagebox.showinfo(
+                parent=self.get_toplevel(),
+                title="Remove Email from Selection",
+                message="Email from or date invalid.",
+            )
+            return
+        if filename in self._email_collector.excluded_emails:
+            tkinter.messagebox.showinfo(
+                parent=self.get_toplevel(),
+                title="Remove Email from Selection",
+                message="".join(
+                    (
+                        filename,
+                        "\n\n",
+                        "is already one of the emails excluded from ",
+                        "the selection.",
                     )
-                    return
-                directorypath = os.path.join(
-                    os.path.expanduser(self._email_collector.outputdirectory),
-                    filename,
-                )
-                if os.path.exists(directorypath):
-                    if (
-                        tkinter.messagebox.askquestion(
-                            parent=self.get_toplevel(),
-                            title="Remove Email from Selection",
-                            message="".join(
-                                (
-                                    filename,
-                                    "\n\nexists in the output directory.  ",
-                                    "You will have to use your system's file ",
-                                    "manager to delete the file.\n\nConfirm ",
-                                    "request to add \n\n",
-                                    wlist.get(*wlist.tag_ranges(ftag)),
-                                    "\n\nto exclude email list in selection ",
-                                    "rules.",
-                                )
-                            ),
+                ),
+            )
+            return
+        directorypath = os.path.join(
+            os.path.expanduser(self._email_collector.outputdirectory),
+            filename,
+        )
+        if os.path.exists(directorypath):
+            if (
+                tkinter.messagebox.askquestion(
+                    parent=self.get_toplevel(),
+                    title="Remove Email from Selection",
+                    message="".join(
+                        (
+                            filename,
+                            "\n\nexists in the output directory.  ",
+                            "You will have to use your system's file ",
+                            "manager to delete the file.\n\nConfirm ",
+                            "request to add \n\n",
+                            _email_from_date(email_item),
+                            "\n\nto exclude email list in selection ",
+                            "rules.",
                         )
-                        != tkinter.messagebox.YES
-                    ):
-                        return
-                elif (
-                    tkinter.messagebox.askquestion(
-                        parent=self.get_toplevel(),
-                        title="Remove Email from Selection",
-                        message="".join(
-                            (
-                                "Confirm request to add \n\n",
-                                wlist.get(*wlist.tag_ranges(ftag)),
-                                "\n\nto exclude email list in selection ",
-                                "rules.",
-                            )
-                        ),
-                    )
-                    != tkinter.messagebox.YES
-                ):
-                    return
-                wconf = self.configctrl
-                start = wconf.index(tkinter.END)
-                wconf.insert(tkinter.END, "\n")
-                wconf.insert(tkinter.END, " ".join((EXCLUDE_EMAIL, filename)))
-                wconf.tag_add(
-                    ftag, start, wconf.index(" ".join((start, "lineend")))
+                    ),
                 )
-                wconf.tag_bind(ftag, "<ButtonPress-1>", self._file_exists)
-                self._email_collector.exclude_email(filename)
-                self._save_configuration()
+                != tkinter.messagebox.YES
+            ):
                 return
+        elif (
+            tkinter.messagebox.askquestion(
+                parent=self.get_toplevel(),
+                title="Remove Email from Selection",
+                message="".join(
+                    (
+                        "Confirm request to add \n\n",
+                        _email_from_date(email_item),
+                        "\n\nto exclude email list in selection ",
+                        "rules.",
+                    )
+                ),
+            )
+            != tkinter.messagebox.YES
+        ):
+            return
+        wconf = self.configctrl
+        start = wconf.index(tkinter.END)
+        wconf.insert(tkinter.END, "\n")
+        wconf.insert(tkinter.END, " ".join((EXCLUDE_EMAIL, filename)))
+        wconf.tag_add(
+            EXCLUDE_TAG, start, wconf.index(" ".join((start, "lineend")))
+        )
+        self._exclude_lines[filename] = int(start.split(".")[0])
+        self._email_collector.exclude_email(filename)
+        self._write_configuration()
+        self.statusbar.set_status_text(" ".join((filename, "excluded")))
+        return
 
     def _save_configuration(self, set_edited_flag=True):
         """Save configuration file and update widgets with latest action."""
+        self._write_configuration(set_edited_flag=set_edited_flag)
+        self._stop_selection()
+        self._clear_email_rows()
+        self.statusbar.set_status_text()
+        self._email_collector = None
+        self.__start = None
+        self.__end = None
+        if self._most_recent_action:
+            self._most_recent_action()
+
+    def _write_configuration(self, set_edited_flag=True):
+        """Save configuration file without changing the selection shown."""
         if set_edited_flag:
             self._configuration_edited = True
         with open(self._configuration, "w", encoding="utf8") as ocf:
@@ -946,15 +1130,6 @@ class Select(Bindings):
             )
             if set_edited_flag:
                 self._configuration_edited = False
-        self._clear_email_tags()
-        self.emailtextctrl.delete("1.0", tkinter.END)
-        self.emaillistctrl.delete("1.0", tkinter.END)
-        self.statusbar.set_status_text()
-        self._email_collector = None
-        self.__start = None
-        self.__end = None
-        if self._most_recent_action:
-            self._most_recent_action()
 
     def _file_exists(self, event=None):
         """Report existence of filename under pointer in status bar."""
@@ -987,6 +1162,203 @@ class Select(Bindings):
             )
 
 
+def _exclude_line_filename(line):
+    """Return filename excluded by configuration line or None.
+
+    The line is split as EmailCollector.parse does, so the keyword can be in
+    any case and the filename can be followed by whitespace and a comment.
+
+    """
+    match = EmailCollector.email_select_line.match(line)
+    if not match:
+        return None
+    key, value = match.groups()
+    if key is None or key.lower() != EXCLUDE_EMAIL:
+        return None
+    return value.strip() or None
+
+
+def _email_from_date(email_item):
+    """Return From and Date headers of email_item on separate lines."""
+    return "\n".join((email_item.get("From", ""), email_item.get("Date", "")))
+
+
+def _insert_email_summary(widget, email_item):
+    """Insert From, Date, and Subject headers of email_item in widget."""
+    widget.insert(tkinter.END, _email_from_date(email_item))
+    widget.insert(tkinter.END, "\n")
+    widget.insert(tkinter.END, email_item.get("Subject", ""))
+    widget.insert(tkinter.END, "\n\n\n")
+
+
+def _insert_email_text(widget, email_item):
+    """Insert text of email_item in widget."""
+    widget.insert(tkinter.END, email_item.as_string())
+    widget.insert(tkinter.END, "\n\n\n\n")
+
+
+def _select_emails(collector, ui_queue, add_rows, done):
+    """Select emails with collector and pass them to main thread.
+
+    This function is run in a worker thread.
+
+    ui_queue - queue of (function, args) to be called in main thread
+    add_rows - function called with a list of emails found
+    done - function called with the exception which stopped the selection,
+           or None, when the selection has finished
+
+    """
+    rows = []
+    sent = time.monotonic()
+    try:
+        for row in collector.iter_selected(keep=True):
+            rows.append(row[-1])
+            if (
+                len(rows) >= PAGE_SIZE
+                or time.monotonic() - sent >= ROWS_INTERVAL
+            ):
+                ui_queue.put((add_rows, (rows,)))
+                rows = []
+                sent = time.monotonic()
+    except Exception as exc:
+        if rows:
+            ui_queue.put((add_rows, (rows,)))
+        ui_queue.put((done, (exc,)))
+        return
+    if rows:
+        ui_queue.put((add_rows, (rows,)))
+    ui_queue.put((done, (None,)))
+
+
+class EmailRows:
+    """Show a few pages of a list of emails in a Text widget.
+
+    The emails near the position being viewed are put in the widget when
+    the widget is scrolled, so the time and memory needed to show a list
+    of emails does not depend on the number of emails.
+
+    """
+
+    def __init__(self, widget, insert, page_size=PAGE_SIZE):
+        """Note widget and function to put an email in the widget.
+
+        widget - a tkinter.Text widget
+        insert - function(widget, email) inserting email at end of widget
+        page_size - number of emails in a page
+
+        """
+        self.widget = widget
+        self.insert = insert
+        self.page_size = page_size
+        self.rows = []
+        self.first = 0
+        self._starts = []
+        self._rendering = False
+        self._pending = None
+        widget.configure(yscrollcommand=self._scrolled)
+
+    def set_rows(self, rows):
+        """Show first pages of rows, a list of emails, in widget."""
+        self.rows = rows
+        self._render(0)
+        self.widget.yview_moveto(0)
+
+    def extend(self, rows):
+        """Append rows, a list of emails, to rows shown in widget.
+
+        The emails are put in the widget if there is room in the pages.
+
+        """
+        self.rows.extend(rows)
+        self._rendering = True
+        try:
+            while len(self._starts) < 3 * self.page_size:
+                row = self.first + len(self._starts)
+                if row >= len(self.rows):
+                    break
+                self._append(self.rows[row])
+        finally:
+            self._rendering = False
+
+    def clear(self):
+        """Forget emails and clear widget."""
+        self.rows = []
+        self.first = 0
+        self._starts = []
+        self.widget.delete("1.0", tkinter.END)
+
+    def row_at(self, index):
+        """Return row of email at index in widget or None."""
+        if not self._starts:
+            return None
+        line = int(self.widget.index(index).split(".")[0])
+        position = bisect.bisect_right(self._starts, line) - 1
+        if position < 0:
+            return None
+        return self.first + position
+
+    def see(self, row):
+        """Scroll widget to show email in row at top."""
+        if not self.first <= row < self.first + len(self._starts):
+            self._render(self._window_start(row))
+        self.widget.yview(".".join((str(self._starts[row - self.first]), "0")))
+
+    def _window_start(self, row):
+        """Return first row in pages to be shown when row is viewed."""
+        return max(
+            0, min(row - self.page_size, len(self.rows) - 3 * self.page_size)
+        )
+
+    def _render(self, first):
+        """Put emails in three pages starting at row first in widget."""
+        widget = self.widget
+        self._rendering = True
+        try:
+            widget.delete("1.0", tkinter.END)
+            self.first = first
+            self._starts = []
+            for email_item in self.rows[first : first + 3 * self.page_size]:
+                self._append(email_item)
+        finally:
+            self._rendering = False
+
+    def _append(self, email_item):
+        """Put email_item at end of widget."""
+        widget = self.widget
+        self._starts.append(
+            int(
+                widget.index(" ".join((tkinter.END, "-1 chars"))).split(".")[0]
+            )
+        )
+        self.insert(widget, email_item)
+
+    def _scrolled(self, *args):
+        """Schedule change of emails shown if view is near edge of pages."""
+        del args
+        if self._rendering or self._pending is not None:
+            return
+        self._pending = self.widget.after_idle(self._move_window)
+
+    def _move_window(self):
+        """Show pages around emails in view if view is near edge of pages."""
+        self._pending = None
+        top = self.row_at("@0,0")
+        if top is None:
+            return
+        offset = top - self.first
+        if self.page_size <= offset < 2 * self.page_size:
+            return
+        first = self._window_start(top)
+        if first == self.first:
+            return
+        line_offset = int(self.widget.index("@0,0").split(".")[0])
+        line_offset -= self._starts[offset]
+        self._render(first)
+        self.widget.yview(
+            ".".join((str(self._starts[top - first] + line_offset), "0"))
+        )
+
+
 class Statusbar:
     """Status bar for EmailStore application."""
 